@@ -0,0 +1,10 @@
+"""
+Pipeline de construction de la base clubs (scraping, fusion, nettoyage).
+
+Point d'entrée: python -m parsing --help
+
+Les modules utilisent des imports relatifs : ils se lancent toujours comme
+modules du paquet, jamais par leur chemin (python3 parsing/x.py échoue):
+    python3 -m parsing query ...        (sous-commande, chemins --data-dir)
+    python3 -m parsing.query_base ...   (module seul, chemins par défaut)
+"""
@@ -0,0 +1,234 @@
+"""
+=============================================================================
+PIPELINE BASE CLUBS - Point d'entrée unique
+=============================================================================
+
+Enchaîne les étapes dans un seul processus. Avec `all`, les enregistrements
+passent d'une étape à l'autre en mémoire ; les CSV intermédiaires sont
+toujours écrits, mais jamais relus.
+
+Usage:
+    python3 -m parsing scrape-lva
+    python3 -m parsing scrape-retro
+    python3 -m parsing crawl
+    python3 -m parsing rebuild
+    python3 -m parsing clean
+    python3 -m parsing all --data-dir bdd_club/auto
+    python3 -m parsing query source=lva-auto has:site
+    python3 -m parsing render --eml out/noel/
+    python3 -m parsing images
+    python3 -m parsing pages
+    python3 -m parsing send --host localhost --port 1025
+    python3 -m parsing sink
+    python3 -m parsing --trace run.json --profile clean.smtp clean
+    python3 -m parsing watch --interval 24
+    python3 -m parsing synth --rows 100000 -o /tmp/synth
+    python3 -m parsing bench --sizes 10000,100000,1000000
+
+=============================================================================
+"""
+
+import argparse
+import os
+import sys
+
+from . import trace
+
+DATA_DIR = "bdd_club/auto"
+
+# Noms des fichiers dans le dossier de données
+LVA_FILE = "lva-auto.csv"
+RETRO_FILE = "retrocalage.csv"
+BASE_FILE = "Base Club Auto.csv"
+CLEAN_FILE = "Base Club Auto - Clean.csv"
+NPAI_FILE = "npai.csv"
+RETRO_DEBUG_FILE = "retrocalage_debug.html"
+SEND_LOG_DIR = "envois"
+SITE_EMAILS_FILE = "emails_sites.csv"
+CRAWL_CACHE_DIR = ".crawl-cache"
+WATCH_JOURNAL_FILE = "veille.csv"
+
+
+def data_path(args, name):
+    return os.path.join(args.data_dir, name)
+
+
+# =============================================================================
+# ÉTAPES
+# =============================================================================
+
+def run_scrape_lva(args):
+    from . import scrape_lva_clubs
+    return scrape_lva_clubs.main(data_path(args, LVA_FILE))
+
+
+def run_scrape_retro(args):
+    from . import scrape_retrocalage
+    return scrape_retrocalage.main(data_path(args, RETRO_FILE), data_path(args, RETRO_DEBUG_FILE))
+
+
+def run_crawl(args, lva_rows=None, retro_rows=None):
+    from . import crawl_sites
+    if lva_rows is None or retro_rows is None:
+        return crawl_sites.main(args.extra_args, prog="python3 -m parsing crawl",
+                                lva_file=data_path(args, LVA_FILE),
+                                retro_file=data_path(args, RETRO_FILE),
+                                output_file=data_path(args, SITE_EMAILS_FILE),
+                                cache_dir=data_path(args, CRAWL_CACHE_DIR))
+    found = crawl_sites.crawl(lva_rows, retro_rows, cache_dir=data_path(args, CRAWL_CACHE_DIR))
+    crawl_sites.save_csv(found, data_path(args, SITE_EMAILS_FILE))
+    return {site: email for site, (_, email, _) in found.items()}
+
+
+def run_rebuild(args, lva_rows=None, retro_rows=None, site_emails=None):
+    from . import crawl_sites, rebuild_base
+    if lva_rows is None:
+        lva_rows = rebuild_base.load_source(data_path(args, LVA_FILE))
+    if retro_rows is None:
+        retro_rows = rebuild_base.load_source(data_path(args, RETRO_FILE))
+    if site_emails is None:
+        site_emails = crawl_sites.load_csv(data_path(args, SITE_EMAILS_FILE))
+    clubs = rebuild_base.build_base(lva_rows, retro_rows, site_emails)
+    rebuild_base.write_base(clubs, data_path(args, BASE_FILE))
+    return clubs
+
+
+def run_clean(args, rows=None):
+    from . import clean_emails_strict
+    if rows is None:
+        return clean_emails_strict.main(data_path(args, BASE_FILE),
+                                        data_path(args, CLEAN_FILE),
+                                        data_path(args, NPAI_FILE))
+    return clean_emails_strict.clean(rows, data_path(args, CLEAN_FILE),
+                                     data_path(args, NPAI_FILE))
+
+
+def run_all(args):
+    from .club import LVA, RETRO, from_rows
+    with trace.span('stage.scrape-lva'):
+        lva_rows = from_rows(run_scrape_lva(args), LVA)
+    with trace.span('stage.scrape-retro'):
+        retro_rows = from_rows(run_scrape_retro(args), RETRO)
+    with trace.span('stage.crawl'):
+        site_emails = run_crawl(args, lva_rows, retro_rows)
+    with trace.span('stage.rebuild'):
+        base_rows = run_rebuild(args, lva_rows, retro_rows, site_emails)
+    with trace.span('stage.clean'):
+        return run_clean(args, base_rows)
+
+
+def run_query(args):
+    from . import query_base
+    return query_base.main(args.extra_args, prog="python3 -m parsing query",
+                           base_file=data_path(args, CLEAN_FILE),
+                           npai_file=data_path(args, NPAI_FILE))
+
+
+def run_render(args):
+    from . import render_emails
+    return render_emails.main(args.extra_args, prog="python3 -m parsing render",
+                              base_file=data_path(args, CLEAN_FILE))
+
+
+def run_images(args):
+    from . import build_images
+    return build_images.main(args.extra_args, prog="python3 -m parsing images")
+
+
+def run_pages(args):
+    from . import build_pages
+    return build_pages.main(args.extra_args, prog="python3 -m parsing pages")
+
+
+def run_send(args):
+    from . import send_campaign
+    return send_campaign.main(args.extra_args, prog="python3 -m parsing send",
+                              base_file=data_path(args, CLEAN_FILE),
+                              log_dir=data_path(args, SEND_LOG_DIR))
+
+
+def run_sink(args):
+    from . import smtp_sink
+    return smtp_sink.main(args.extra_args, prog="python3 -m parsing sink")
+
+
+def run_watch(args):
+    from . import watch_directories
+    return watch_directories.main(args.extra_args, prog="python3 -m parsing watch",
+                                  lva_file=data_path(args, LVA_FILE),
+                                  retro_file=data_path(args, RETRO_FILE),
+                                  base_file=data_path(args, BASE_FILE),
+                                  clean_file=data_path(args, CLEAN_FILE),
+                                  npai_file=data_path(args, NPAI_FILE),
+                                  journal_file=data_path(args, WATCH_JOURNAL_FILE),
+                                  site_emails_file=data_path(args, SITE_EMAILS_FILE),
+                                  debug_file=data_path(args, RETRO_DEBUG_FILE))
+
+
+def run_synth(args):
+    from . import synthetic
+    return synthetic.main(args.extra_args, prog="python3 -m parsing synth")
+
+
+def run_bench(args):
+    from . import bench_pipeline
+    return bench_pipeline.main(args.extra_args, prog="python3 -m parsing bench")
+
+
+COMMANDS = {
+    'scrape-lva': (run_scrape_lva, "scrape l'annuaire lva-auto.fr"),
+    'scrape-retro': (run_scrape_retro, "scrape l'annuaire retrocalage.com"),
+    'crawl': (run_crawl, "cherche les emails manquants sur les sites des clubs"),
+    'rebuild': (run_rebuild, "reconstruit Base Club Auto.csv depuis les sources"),
+    'clean': (run_clean, "nettoyage strict des emails (MX + SMTP)"),
+    'all': (run_all, "enchaîne toutes les étapes en mémoire"),
+    'watch': (run_watch, "veille des annuaires : ajoute les nouveaux clubs sans re-crawl complet"),
+    'query': (run_query, "exporte un segment de la base nettoyée"),
+    'render': (run_render, "génère les emails personnalisés (.eml / mbox)"),
+    'images': (run_images, "génère les images responsive des landing pages"),
+    'pages': (run_pages, "minifie les pages, inline le CSS des emails, vérifie les budgets"),
+    'send': (run_send, "envoie une campagne sur la base nettoyée (SMTP)"),
+    'sink': (run_sink, "serveur SMTP local : vérifie l'envoi et la reprise de send"),
+    'synth': (run_synth, "génère des annuaires synthétiques (doublons, mojibake)"),
+    'bench': (run_bench, "mesure fusion + nettoyage à 10k / 100k / 1M lignes"),
+}
+
+# Sous-commandes dont les arguments sont transmis tels quels au module
+PASSTHROUGH = {'query', 'render', 'images', 'pages', 'send', 'sink', 'crawl', 'synth', 'bench', 'watch'}
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m parsing", description="Pipeline base clubs")
+    parser.add_argument('--data-dir', default=os.environ.get('CLUB_DATA_DIR', DATA_DIR),
+                        help=f"dossier des CSV (défaut: $CLUB_DATA_DIR ou {DATA_DIR})")
+    parser.add_argument('--trace', metavar='FICHIER',
+                        help="écrit une trace Chrome (chrome://tracing) et le temps par étape")
+    parser.add_argument('--profile', metavar='SPAN',
+                        help="profil cProfile d'un span (ex: clean.smtp), avec --trace")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text, add_help=(name not in PASSTHROUGH))
+    args, extra = parser.parse_known_args(argv)
+    if args.command in PASSTHROUGH:
+        args.extra_args = extra
+    elif extra:
+        parser.error(f"arguments inconnus: {' '.join(extra)}")
+    if args.profile and not args.trace:
+        parser.error("--profile nécessite --trace")
+    if args.trace:
+        trace.enable(args.trace, args.profile)
+
+    try:
+        with trace.span(f'stage.{args.command}'):
+            COMMANDS[args.command][0](args)
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrompu")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
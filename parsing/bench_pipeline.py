@@ -0,0 +1,262 @@
+"""
+=============================================================================
+BENCHMARK DU PIPELINE - Fusion et nettoyage à 10k / 100k / 1M lignes
+=============================================================================
+
+Pour chaque taille :
+1. Génère des annuaires synthétiques (synthetic.py) dans un dossier de
+   travail ; cette étape n'est pas mesurée
+2. Enchaîne les étapes de rebuild_base et clean_emails_strict comme le fait
+   `python3 -m parsing rebuild clean` : chargement des sources, fusion et
+   dédoublonnage, écriture de la base, relecture, nettoyage
+3. Mesure le temps et le pic mémoire (tracemalloc) de chaque étape
+
+Le réseau est remplacé par un stub déterministe : un domaine n'a pas de MX,
+une adresse est refusée en SMTP selon un hash (taux réglables), avec une
+latence simulée optionnelle. Les gros providers ont toujours un MX, comme
+en vrai.
+
+Les résultats sont ajoutés à un CSV (une ligne par taille et par étape)
+pour comparer les runs entre eux.
+
+tracemalloc ralentit les étapes (x1.5 à x3) : --no-memory pour des temps
+non perturbés (le pic mémoire est alors le RSS max du processus).
+
+Usage:
+    python3 -m parsing bench
+    python3 -m parsing bench --sizes 10000,100000 --results bench.csv
+    python3 -m parsing bench --sizes 1000000 --dns-ms 2 --no-memory
+
+=============================================================================
+"""
+
+import argparse
+import csv
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+
+from . import club, clean_emails_strict, rebuild_base, synthetic
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+SIZES = (10_000, 100_000, 1_000_000)
+RESULTS_FILE = "bench_pipeline.csv"
+NO_MX_RATE = 0.05
+REJECT_RATE = 0.10
+RESULT_FIELDS = ['date', 'rows', 'stage', 'seconds', 'records', 'records_per_s', 'peak_mb', 'retained_mb']
+
+
+# =============================================================================
+# STUB RÉSEAU
+# =============================================================================
+
+def _hashed(value, rate):
+    """Vrai pour une fraction `rate` des valeurs, toujours les mêmes."""
+    return zlib.crc32(value.encode('utf-8')) % 10_000 < rate * 10_000
+
+
+@contextmanager
+def stub_network(no_mx_rate=NO_MX_RATE, reject_rate=REJECT_RATE, dns_ms=0, smtp_ms=0):
+    """Remplace les appels DNS et SMTP de clean_emails_strict le temps du bloc."""
+    def get_mx_host(domain):
+        if dns_ms:
+            time.sleep(dns_ms / 1000)
+        if domain not in clean_emails_strict.TRUSTED_PROVIDERS and _hashed(domain, no_mx_rate):
+            return None
+        return f"mx.{domain}"
+
+    def verify_email_smtp(email, mx_host):
+        if smtp_ms:
+            time.sleep(smtp_ms / 1000)
+        if _hashed(email, reject_rate):
+            return False, "reject_550"
+        return True, "ok"
+
+    saved = clean_emails_strict.get_mx_host, clean_emails_strict.verify_email_smtp
+    clean_emails_strict.get_mx_host, clean_emails_strict.verify_email_smtp = get_mx_host, verify_email_smtp
+    try:
+        yield
+    finally:
+        clean_emails_strict.get_mx_host, clean_emails_strict.verify_email_smtp = saved
+
+
+# =============================================================================
+# MESURE
+# =============================================================================
+
+class Stages:
+    """Chronomètre les étapes d'une taille et garde une ligne de résultat par étape."""
+
+    def __init__(self, rows, memory=True):
+        self.rows = rows
+        self.memory = memory
+        self.results = []
+
+    @contextmanager
+    def stage(self, name):
+        """Le bloc peut renseigner result['records'] (nombre d'enregistrements produits)."""
+        result = {'rows': self.rows, 'stage': name, 'records': self.rows}
+        if self.memory:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            yield result
+        seconds = time.perf_counter() - start
+
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            result['peak_mb'] = round(peak / 1e6, 1)
+            result['retained_mb'] = round((current - before) / 1e6, 1)
+        else:
+            result['peak_mb'] = round(max_rss() / 1e6, 1)
+            result['retained_mb'] = ''
+        result['seconds'] = round(seconds, 3)
+        result['records_per_s'] = round(result['records'] / seconds) if seconds else ''
+        self.results.append(result)
+        print(f"   {name:<10} {seconds:>8.2f}s  {result['records']:>9} enr.  "
+              f"{result['records_per_s'] or 0:>9} enr./s  pic {result['peak_mb']:>7} Mo")
+
+
+def max_rss():
+    """RSS max du processus en octets (ru_maxrss est en Ko sous Linux, en octets sous macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def run_size(rows, work_dir, memory=True, seed=0, network=None, synth_options=None):
+    """Exécute toutes les étapes pour une taille ; renvoie les résultats par étape."""
+    print(f"\n📏 {rows} lignes")
+    data_dir = os.path.join(work_dir, str(rows))
+    base_file = os.path.join(data_dir, "Base Club Auto.csv")
+    clean_file = os.path.join(data_dir, "Base Club Auto - Clean.csv")
+    npai_file = os.path.join(data_dir, "npai.csv")
+
+    stages = Stages(rows, memory)
+
+    # Génération hors mesure (et hors tracemalloc, qui la ralentit beaucoup)
+    if memory:
+        tracemalloc.stop()
+    start = time.perf_counter()
+    lva_file, retro_file = synthetic.write(rows, data_dir, seed=seed, **(synth_options or {}))
+    print(f"   {'generate':<10} {time.perf_counter() - start:>8.2f}s  (non comptée)")
+    # Le cache d'adresses de club.py partage les chaînes entre clubs : vidé
+    # juste avant le chargement pour que chaque taille en paie tout le coût
+    club.clear_places()
+    if memory:
+        tracemalloc.start()
+
+    with stages.stage('load'):
+        lva_rows = rebuild_base.load_source(lva_file)
+        retro_rows = rebuild_base.load_source(retro_file)
+
+    with stages.stage('merge') as result:
+        clubs = rebuild_base.build_base(lva_rows, retro_rows, {})
+        result['records'] = len(clubs)
+    del lva_rows, retro_rows
+
+    with stages.stage('write') as result:
+        rebuild_base.write_base(clubs, base_file)
+        result['records'] = len(clubs)
+    del clubs
+
+    with stages.stage('read') as result:
+        clubs = club.read_sarbacane(base_file)
+        result['records'] = len(clubs)
+
+    with stages.stage('clean') as result, stub_network(**(network or {})):
+        valid = clean_emails_strict.clean(clubs, clean_file, npai_file)
+        result['records'] = len(clubs)
+    print(f"   ✅ {len(valid)} valides / {len(clubs)} ({len(clubs) - len(valid)} NPAI)")
+
+    return stages.results
+
+
+def save_results(results, path):
+    """Ajoute les résultats au CSV (en-tête écrit à la création)."""
+    new = not os.path.exists(path)
+    date = datetime.now().isoformat(timespec='seconds')
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if new:
+            writer.writeheader()
+        for result in results:
+            writer.writerow({'date': date, **result})
+    print(f"\n💾 Résultats: {path}")
+
+
+def print_summary(results):
+    """Temps total et pic mémoire max par taille."""
+    print(f"\n{'='*60}")
+    print(f"{'lignes':>10} {'temps':>10} {'pic mémoire':>14}   étape la plus lente")
+    for rows in sorted({r['rows'] for r in results}):
+        size = [r for r in results if r['rows'] == rows]
+        slowest = max(size, key=lambda r: r['seconds'])
+        print(f"{rows:>10} {sum(r['seconds'] for r in size):>9.1f}s "
+              f"{max(r['peak_mb'] for r in size):>11.0f} Mo   {slowest['stage']} ({slowest['seconds']:.1f}s)")
+    print(f"{'='*60}")
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark fusion + nettoyage sur données synthétiques")
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help="tailles à mesurer (lignes)")
+    parser.add_argument('--results', default=RESULTS_FILE, help=f"CSV des résultats, complété à chaque run (défaut: {RESULTS_FILE})")
+    parser.add_argument('--work-dir', help="dossier des fichiers générés (défaut: temporaire, supprimé)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dup-rate', type=float, default=synthetic.DUP_RATE)
+    parser.add_argument('--mojibake-rate', type=float, default=synthetic.MOJIBAKE_RATE)
+    parser.add_argument('--no-mx-rate', type=float, default=NO_MX_RATE, help="part des domaines sans MX (stub)")
+    parser.add_argument('--reject-rate', type=float, default=REJECT_RATE, help="part des adresses refusées en SMTP (stub)")
+    parser.add_argument('--dns-ms', type=float, default=0, help="latence simulée par requête DNS")
+    parser.add_argument('--smtp-ms', type=float, default=0, help="latence simulée par vérification SMTP")
+    parser.add_argument('--no-memory', action='store_true', help="sans tracemalloc (temps exacts, pic = RSS max)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="bench-clubs-")
+    network = {'no_mx_rate': args.no_mx_rate, 'reject_rate': args.reject_rate,
+               'dns_ms': args.dns_ms, 'smtp_ms': args.smtp_ms}
+    synth_options = {'dup_rate': args.dup_rate, 'mojibake_rate': args.mojibake_rate}
+
+    memory = not args.no_memory
+    if memory:
+        tracemalloc.start()
+    results = []
+    try:
+        for rows in sizes:
+            results += run_size(rows, work_dir, memory, args.seed, network, synth_options)
+            if not args.work_dir:
+                shutil.rmtree(os.path.join(work_dir, str(rows)), ignore_errors=True)
+    finally:
+        if memory:
+            tracemalloc.stop()
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if results:
+            save_results(results, args.results)
+
+    print_summary(results)
+    return results
+
+
+if __name__ == "__main__":
+    main()
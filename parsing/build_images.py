@@ -0,0 +1,314 @@
+"""
+=============================================================================
+BUILD DES IMAGES RESPONSIVE - Landing pages
+=============================================================================
+
+Pour chaque image locale référencée par les pages (<img src="images/...">):
+1. Vérifie qu'elle existe (le build échoue sinon, avec la liste complète)
+2. Génère des variantes WebP/AVIF à plusieurs largeurs, dans un pool de
+   processus ; une image dont le hash n'a pas changé n'est pas recalculée.
+   Les variantes sont écrites à côté des pages construites (dist/pages/images/)
+   pour que les URL images/... des pages restent valables
+3. Reconstruit les pages (build_pages) : les <img> deviennent des <picture>
+   avec srcset/sizes, width/height et loading="lazy", dans dist/pages/
+
+Les noms de variantes contiennent le hash du fichier source (cache busting).
+
+Usage:
+    python3 -m parsing images
+    python3 -m parsing images --widths 640,1280 --pages pages/index.html
+
+=============================================================================
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+from multiprocessing import Pool
+
+from .lazy import require
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+ROOT_DIR = "."
+PAGES = ["pages/index.html"]
+OUTPUT_DIR = "dist"
+PAGES_OUTPUT = "pages"                   # relatif à OUTPUT_DIR, où build_pages écrit les pages
+MANIFEST_FILE = "pages/.images-manifest.json"   # relatif à OUTPUT_DIR
+WIDTHS = (480, 800, 1200, 1600)
+FORMATS = ('avif', 'webp')
+QUALITY = {'webp': 78, 'avif': 55}
+SIZES = "(max-width: 768px) 100vw, 50vw"
+MANIFEST_VERSION = 1
+
+IMG_REGEX = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+ATTR_REGEX = re.compile(r'([\w-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+
+# =============================================================================
+# ANALYSE DES PAGES
+# =============================================================================
+
+def is_local(src):
+    return bool(src) and not re.match(r'^(?:[a-z]+:)?//|^data:', src, re.IGNORECASE)
+
+
+def img_attrs(tag):
+    """Attributs d'une balise <img> (ordre conservé)."""
+    return {m.group(1).lower(): html.unescape(m.group(2) if m.group(2) is not None else m.group(3))
+            for m in ATTR_REGEX.finditer(tag)}
+
+
+def referenced_images(pages):
+    """Renvoie les src locaux référencés par les pages, dans l'ordre d'apparition."""
+    sources = {}
+    for page in pages:
+        with open(page, 'r', encoding='utf-8') as f:
+            content = f.read()
+        for tag in IMG_REGEX.findall(content):
+            src = img_attrs(tag).get('src', '')
+            if is_local(src):
+                sources.setdefault(src, page)
+    return sources
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+# =============================================================================
+# GÉNÉRATION DES VARIANTES (workers)
+# =============================================================================
+
+def build_variants(job):
+    """
+    Génère les variantes d'une image. Exécuté dans un worker : PIL n'est
+    importé qu'ici.
+    """
+    src, path, digest, out_dir, widths, formats = job
+    Image = require('PIL.Image')
+    ImageOps = require('PIL.ImageOps')
+
+    stem = os.path.splitext(os.path.basename(src))[0]
+    url_dir = os.path.dirname(src)
+
+    with Image.open(path) as img:
+        width, height = img.size
+        targets = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+        # Décodage JPEG directement à l'échelle utile (beaucoup plus rapide)
+        img.draft('RGB', (max(targets), max(targets) * height // width))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGB')
+        width, height = img.size
+        targets = sorted({min(target, width) for target in targets})
+
+        variants = {fmt: [] for fmt in formats}
+        for target in targets:
+            resized = img if target == width else img.resize(
+                (target, round(height * target / width)), Image.LANCZOS, reducing_gap=3.0)
+            for fmt in formats:
+                name = f"{stem}-{digest[:8]}-{target}.{fmt}"
+                resized.save(os.path.join(out_dir, name), fmt.upper(), quality=QUALITY[fmt])
+                variants[fmt].append([target, f"{url_dir}/{name}" if url_dir else name,
+                                      os.path.getsize(os.path.join(out_dir, name))])
+
+    return src, {
+        'hash': digest,
+        'width': width,
+        'height': height,
+        'bytes': os.path.getsize(path),
+        'widths': list(widths),
+        'variants': variants,
+    }
+
+
+def available_formats(formats):
+    """Retire les formats que Pillow ne sait pas écrire (AVIF selon la version)."""
+    Image = require('PIL.Image')
+    try:
+        import pillow_avif  # noqa: F401 - enregistre le codec AVIF sur Pillow < 11.2
+    except ImportError:
+        pass
+    Image.init()
+    usable = tuple(fmt for fmt in formats if fmt.upper() in Image.SAVE)
+    for fmt in formats:
+        if fmt not in usable:
+            print(f"   ⚠️ Format {fmt} non supporté par Pillow, ignoré (pip3 install pillow-avif-plugin)")
+    return usable
+
+
+# =============================================================================
+# RÉÉCRITURE DES <img>
+# =============================================================================
+
+def srcset(entries):
+    return ', '.join(f"{url} {width}w" for width, url, _ in entries)
+
+
+def rewrite_img_tags(content, manifest):
+    """Remplace chaque <img> local connu du manifeste par un <picture> responsive."""
+    images = manifest.get('images', {})
+    sizes = manifest.get('sizes', SIZES)
+
+    def replace(match):
+        tag = match.group(0)
+        attrs = img_attrs(tag)
+        entry = images.get(attrs.get('src', ''))
+        if not entry:
+            return tag
+
+        variants = entry['variants']
+        formats = [fmt for fmt in FORMATS if variants.get(fmt)]
+        if not formats:
+            raise ValueError(f"{attrs['src']}: aucune variante dans le manifeste (relancer python3 -m parsing images)")
+        fallback = formats[-1]
+        # Fallback src : la variante la plus proche de 800px
+        default = min(variants[fallback], key=lambda v: abs(v[0] - 800))
+
+        attrs['src'] = default[1]
+        attrs['srcset'] = srcset(variants[fallback])
+        attrs.setdefault('sizes', sizes)
+        attrs.setdefault('width', str(entry['width']))
+        attrs.setdefault('height', str(entry['height']))
+        attrs.setdefault('loading', 'lazy')
+        attrs.setdefault('decoding', 'async')
+
+        img = '<img ' + ' '.join(f'{k}="{html.escape(v, quote=True)}"' for k, v in attrs.items()) + '>'
+        sources = ''.join(
+            f'<source type="image/{fmt}" srcset="{html.escape(srcset(variants[fmt]))}" sizes="{html.escape(attrs["sizes"])}">'
+            for fmt in formats[:-1]
+        )
+        return f'<picture>{sources}{img}</picture>'
+
+    return IMG_REGEX.sub(replace, content)
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': MANIFEST_VERSION, 'images': {}}
+
+
+def is_fresh(entry, digest, widths, formats, out_dir):
+    """Une image est à jour si son hash, ses réglages et ses fichiers n'ont pas bougé."""
+    if not entry or entry.get('hash') != digest or entry.get('widths') != list(widths):
+        return False
+    variants = entry.get('variants', {})
+    if set(variants) != set(formats):
+        return False
+    return all(os.path.exists(os.path.join(out_dir, os.path.basename(v[1])))
+               for fmt in formats for v in variants[fmt])
+
+
+def build_images(pages=PAGES, root_dir=ROOT_DIR, output_dir=OUTPUT_DIR, widths=WIDTHS,
+                 formats=FORMATS, sizes=SIZES, workers=None):
+    """Génère les variantes manquantes et renvoie le manifeste à jour."""
+    sources = referenced_images(pages)
+    missing = [(src, page) for src, page in sources.items()
+               if not os.path.isfile(os.path.join(root_dir, src))]
+    if missing:
+        print("❌ Images manquantes:")
+        for src, page in missing:
+            print(f"   {src} (référencée par {page})")
+        sys.exit(1)
+
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    manifest = load_manifest(manifest_path)
+    formats = available_formats(formats)
+    if not formats:
+        print("❌ Aucun format d'image utilisable par Pillow (webp/avif) : pip3 install --upgrade pillow")
+        sys.exit(1)
+
+    jobs = []
+    images = {}
+    for src in sources:
+        path = os.path.join(root_dir, src)
+        out_dir = os.path.join(output_dir, PAGES_OUTPUT, os.path.dirname(src))
+        os.makedirs(out_dir, exist_ok=True)
+        digest = file_hash(path)
+        entry = manifest['images'].get(src)
+        if is_fresh(entry, digest, widths, formats, out_dir):
+            images[src] = entry
+        else:
+            jobs.append((src, path, digest, out_dir, tuple(widths), formats))
+
+    print(f"🖼️  {len(sources)} images référencées, {len(jobs)} à générer, {len(sources) - len(jobs)} à jour")
+    if jobs:
+        with Pool(workers) as pool:
+            for src, entry in pool.imap_unordered(build_variants, jobs):
+                images[src] = entry
+                print(f"   ✅ {src}")
+
+    manifest = {'version': MANIFEST_VERSION, 'sizes': sizes,
+                'images': {src: images[src] for src in sources}}
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def page_weight(manifest):
+    """Poids des originaux vs variantes servies au fallback (~800px)."""
+    before = after = 0
+    for entry in manifest['images'].values():
+        before += entry['bytes']
+        fmt = [f for f in FORMATS if entry['variants'].get(f)][-1]
+        after += min(entry['variants'][fmt], key=lambda v: abs(v[0] - 800))[2]
+    return before, after
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Build des images responsive")
+    parser.add_argument('--pages', nargs='+', default=PAGES, help=f"pages à traiter (défaut: {' '.join(PAGES)})")
+    parser.add_argument('--root', default=ROOT_DIR, help="racine du site (où se trouve images/)")
+    parser.add_argument('--output', default=OUTPUT_DIR, help=f"dossier de sortie (défaut: {OUTPUT_DIR})")
+    parser.add_argument('--widths', default=','.join(map(str, WIDTHS)), help="largeurs générées")
+    parser.add_argument('--sizes', default=SIZES, help="attribut sizes par défaut")
+    parser.add_argument('--workers', type=int, default=None, help="processus (défaut: nb de CPU)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    widths = tuple(sorted(int(w) for w in args.widths.split(',')))
+    manifest = build_images(args.pages, args.root, args.output, widths,
+                            sizes=args.sizes, workers=args.workers)
+
+    from .build_pages import build_all
+    errors = build_all(args.pages, args.output, workers=args.workers)
+    for error in errors:
+        print(f"   ❌ {error}")
+
+    before, after = page_weight(manifest)
+    print(f"\n📉 Poids images: {before / 1e6:.1f} Mo -> {after / 1e6:.2f} Mo")
+    print(f"🏁 Terminé en {time.perf_counter() - start:.1f} secondes")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+=============================================================================
+BUILD DES PAGES HTML - Landing pages et templates email
+=============================================================================
+
+Traite pages/*.html en parallèle et écrit le résultat dans dist/pages/ :
+1. Templates email : les règles CSS simples (tag, .classe, #id) des <style>
+   sont inlinées dans les attributs style ; @media et pseudo-classes restent
+2. Landing pages : les <img> locaux passent en <picture> responsive si le
+   manifeste de `python -m parsing images` existe
+3. Minification du HTML et du CSS (commentaires conditionnels MSO conservés)
+4. Les src distants doivent figurer dans pages/remote-assets.json
+5. Budget d'octets par fichier (Gmail tronque les emails au-delà de ~102 Ko) ;
+   les templates email gardent un saut de ligne après chaque balise de bloc,
+   aucune ligne ne doit dépasser 998 octets (RFC 5322, envoi en 8bit)
+
+Une page dont l'entrée et les réglages n'ont pas changé n'est pas
+reconstruite (cache par hash dans dist/pages/.build-cache.json).
+
+Usage:
+    python3 -m parsing pages
+    python3 -m parsing pages --update-manifest
+    python3 -m parsing pages pages/mailing.html --email-budget 80000
+
+=============================================================================
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from multiprocessing import Pool
+
+from . import build_images
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+PAGES_DIR = "pages"
+OUTPUT_DIR = "dist"
+REMOTE_MANIFEST = "pages/remote-assets.json"
+CACHE_FILE = "pages/.build-cache.json"   # relatif à OUTPUT_DIR
+EMAIL_PAGES = ('email-noel-2025.html', 'mailing.html')
+EMAIL_BUDGET = 100_000   # marge sous la limite de troncature Gmail (~102 Ko)
+PAGE_BUDGET = 60_000
+MAX_LINE_OCTETS = 998    # RFC 5322, hors CRLF
+BUILD_VERSION = 2
+
+# Balises autour desquelles les espaces ne sont jamais rendus
+BLOCK_TAGS = (
+    'html|head|body|meta|link|title|style|script|div|section|header|footer|nav|main|'
+    'article|aside|table|thead|tbody|tfoot|tr|td|th|p|h[1-6]|ul|ol|li|center|br|hr|'
+    'picture|source|form|noscript|o:\\w+|xml'
+)
+
+CSS_COMMENT_REGEX = re.compile(r'/\*.*?\*/', re.DOTALL)
+STYLE_BLOCK_REGEX = re.compile(r'(<style\b[^>]*>)(.*?)(</style>)', re.IGNORECASE | re.DOTALL)
+PROTECTED_REGEX = re.compile(
+    r'<!--\[if[^\]]*\]>.*?<!\[endif\]-->|<(pre|textarea|script|style)\b.*?</\1>',
+    re.IGNORECASE | re.DOTALL,
+)
+COMMENT_REGEX = re.compile(r'<!--.*?-->', re.DOTALL)
+START_TAG_REGEX = re.compile(r'<([a-zA-Z][\w:-]*)(\s[^<>]*?)?(/?)>')
+ATTR_REGEX = re.compile(r'([\w:-]+)\s*=\s*("[^"]*"|\'[^\']*\')')
+SIMPLE_SELECTOR_REGEX = re.compile(r'^([a-zA-Z][\w-]*)?((?:[.#][\w-]+)*)$')
+REMOTE_SRC_REGEX = re.compile(r'\bsrc\s*=\s*["\'](https?://[^"\']+)["\']', re.IGNORECASE)
+WHITESPACE_BEFORE_BLOCK = re.compile(r'\s+(</?(?:%s)\b)' % BLOCK_TAGS, re.IGNORECASE)
+WHITESPACE_AFTER_BLOCK = re.compile(r'(</?(?:%s)\b[^>]*>)\s+' % BLOCK_TAGS, re.IGNORECASE)
+BLOCK_TAG_REGEX = re.compile(r'(</?(?:%s)\b[^>]*>)' % BLOCK_TAGS, re.IGNORECASE)
+
+
+# =============================================================================
+# CSS
+# =============================================================================
+
+def css_blocks(css):
+    """Découpe une feuille de style en (prélude, contenu) de premier niveau."""
+    blocks = []
+    i = 0
+    while True:
+        start = css.find('{', i)
+        if start < 0:
+            break
+        depth = 1
+        end = start + 1
+        while end < len(css) and depth:
+            if css[end] == '{':
+                depth += 1
+            elif css[end] == '}':
+                depth -= 1
+            end += 1
+        blocks.append((css[i:start].strip(), css[start + 1:end - 1]))
+        i = end
+    return blocks
+
+
+def parse_declarations(text):
+    """'color: red; margin: 0' -> {'color': 'red', 'margin': '0'} (ordre conservé)"""
+    declarations = {}
+    for part in text.split(';'):
+        prop, sep, value = part.partition(':')
+        if sep and prop.strip() and value.strip():
+            declarations[prop.strip().lower()] = ' '.join(value.split())
+    return declarations
+
+
+def parse_selector(selector):
+    """Renvoie (tag, classes, ids) pour un sélecteur simple, None sinon."""
+    match = SIMPLE_SELECTOR_REGEX.match(selector)
+    if not match or not selector:
+        return None
+    tag = (match.group(1) or '').lower()
+    tokens = re.findall(r'[.#][\w-]+', match.group(2))
+    classes = frozenset(t[1:] for t in tokens if t[0] == '.')
+    ids = frozenset(t[1:] for t in tokens if t[0] == '#')
+    return tag, classes, ids
+
+
+def split_stylesheet(css):
+    """
+    Sépare les règles inlinables (sélecteurs simples uniquement) du reste
+    (@media, pseudo-classes, descendants...) qui reste dans le <style>.
+    """
+    rules = []
+    leftover = []
+    for order, (prelude, body) in enumerate(css_blocks(CSS_COMMENT_REGEX.sub('', css))):
+        selectors = [s.strip() for s in prelude.split(',')]
+        parsed = [parse_selector(s) for s in selectors]
+        if prelude.startswith('@') or not all(parsed):
+            leftover.append(f"{prelude}{{{body}}}")
+            continue
+        declarations = parse_declarations(body)
+        for tag, classes, ids in parsed:
+            specificity = (len(ids), len(classes), 1 if tag else 0)
+            rules.append((specificity, order, tag, classes, ids, declarations))
+    return rules, '\n'.join(leftover)
+
+
+def merge_style(rule_declarations, inline):
+    """L'attribut style l'emporte, sauf sur un !important de la feuille."""
+    merged = dict(rule_declarations)
+    for prop, value in parse_declarations(inline).items():
+        if prop in merged and merged[prop].endswith('!important') and not value.endswith('!important'):
+            continue
+        merged[prop] = value
+    return ';'.join(f"{prop}:{value}" for prop, value in merged.items())
+
+
+def inline_css(content):
+    """Inline les règles simples des <style> dans les balises du <body>."""
+    rules = []
+
+    def keep_leftover(match):
+        found, leftover = split_stylesheet(match.group(2))
+        rules.extend(found)
+        return f"{match.group(1)}{leftover}{match.group(3)}" if leftover.strip() else ''
+
+    content = STYLE_BLOCK_REGEX.sub(keep_leftover, content)
+    # Ordre d'application : spécificité croissante, puis ordre dans la feuille
+    rules.sort(key=lambda rule: (rule[0], rule[1]))
+    if not rules:
+        return content
+
+    def apply(match):
+        tag = match.group(1).lower()
+        attrs_text = match.group(2) or ''
+        attrs = {name.lower(): value[1:-1] for name, value in ATTR_REGEX.findall(attrs_text)}
+        classes = set(attrs.get('class', '').split())
+        element_id = attrs.get('id')
+
+        declarations = {}
+        for _, _, rule_tag, rule_classes, rule_ids, rule_declarations in rules:
+            if rule_tag and rule_tag != tag:
+                continue
+            if not rule_classes <= classes:
+                continue
+            if rule_ids and (not element_id or rule_ids != {element_id}):
+                continue
+            declarations.update(rule_declarations)
+        if not declarations:
+            return match.group(0)
+
+        style = merge_style(declarations, attrs.get('style', ''))
+        attrs_text = ATTR_REGEX.sub(lambda m: '' if m.group(1).lower() == 'style' else m.group(0), attrs_text).rstrip()
+        return f'<{match.group(1)}{attrs_text} style="{style.replace(chr(34), chr(39))}"{match.group(3)}>'
+
+    body = re.search(r'<body\b', content, re.IGNORECASE)
+    start = body.start() if body else 0
+    return content[:start] + START_TAG_REGEX.sub(apply, content[start:])
+
+
+def minify_css(css):
+    css = CSS_COMMENT_REGEX.sub('', css)
+    css = ' '.join(css.split())
+    css = re.sub(r'\s*([{};,])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}')
+
+
+# =============================================================================
+# HTML
+# =============================================================================
+
+def minify_html(content, line_breaks=False):
+    """
+    Supprime commentaires et espaces inutiles, sans toucher aux blocs protégés.
+    line_breaks (emails) : saut de ligne après chaque balise de bloc et
+    chaque règle CSS, pour rester sous la limite de longueur de ligne SMTP.
+    """
+    protected = []
+
+    def style(match):
+        css = minify_css(match.group(2))
+        if line_breaks:
+            css = css.replace('}', '}\n')
+        return match.group(1) + css + match.group(3)
+
+    def protect(match):
+        block = match.group(0)
+        if block[:6].lower() == '<style':
+            block = STYLE_BLOCK_REGEX.sub(style, block)
+        protected.append(block)
+        return f"\x00{len(protected) - 1}\x00"
+
+    content = PROTECTED_REGEX.sub(protect, content)
+    content = COMMENT_REGEX.sub('', content)
+    content = ' '.join(content.split())
+    content = WHITESPACE_BEFORE_BLOCK.sub(r'\1', content)
+    content = WHITESPACE_AFTER_BLOCK.sub(r'\1', content)
+    if line_breaks:
+        content = BLOCK_TAG_REGEX.sub('\\1\n', content)
+    return re.sub(r'\x00(\d+)\x00', lambda m: protected[int(m.group(1))], content)
+
+
+def remote_sources(content):
+    return set(REMOTE_SRC_REGEX.findall(content))
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+def build_page(job):
+    """Construit une page (exécuté dans un worker). Renvoie (nom, html, erreurs)."""
+    name, content, is_email, budget, allowed_remote, images_manifest = job
+    errors = []
+
+    unknown = sorted(remote_sources(content) - allowed_remote)
+    for url in unknown:
+        errors.append(f"src distant absent du manifeste: {url}")
+
+    if is_email:
+        content = inline_css(content)
+    elif images_manifest.get('images'):
+        content = build_images.rewrite_img_tags(content, images_manifest)
+    content = minify_html(content, line_breaks=is_email)
+
+    size = len(content.encode('utf-8'))
+    if size > budget:
+        errors.append(f"{size} octets > budget de {budget}")
+    if is_email:
+        for number, line in enumerate(content.split('\n'), 1):
+            length = len(line.encode('utf-8'))
+            if length > MAX_LINE_OCTETS:
+                errors.append(f"ligne {number}: {length} octets > {MAX_LINE_OCTETS} (RFC 5322)")
+    return name, content, errors
+
+
+def load_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def cache_key(*parts):
+    h = hashlib.sha256(str(BUILD_VERSION).encode())
+    for part in parts:
+        h.update(b'\x00')
+        h.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+    return h.hexdigest()
+
+
+def update_remote_manifest(pages, manifest_file=REMOTE_MANIFEST):
+    """Ajoute au manifeste tous les src distants trouvés dans les pages."""
+    urls = set(load_json(manifest_file, {}).get('urls', []))
+    for page in pages:
+        with open(page, 'r', encoding='utf-8') as f:
+            urls |= remote_sources(f.read())
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump({'urls': sorted(urls)}, f, indent=1, ensure_ascii=False)
+        f.write('\n')
+    print(f"📝 {manifest_file}: {len(urls)} URLs")
+
+
+def build_all(pages=None, output_dir=OUTPUT_DIR, remote_manifest=REMOTE_MANIFEST,
+              email_budget=EMAIL_BUDGET, page_budget=PAGE_BUDGET, workers=None):
+    """Construit les pages modifiées en parallèle ; renvoie la liste des erreurs."""
+    if pages is None:
+        pages = sorted(glob.glob(os.path.join(PAGES_DIR, '*.html')))
+
+    pages_dir = os.path.join(output_dir, build_images.PAGES_OUTPUT)
+    os.makedirs(pages_dir, exist_ok=True)
+    cache_path = os.path.join(output_dir, CACHE_FILE)
+    cache = load_json(cache_path, {})
+
+    remote_raw = b''
+    if os.path.exists(remote_manifest):
+        with open(remote_manifest, 'rb') as f:
+            remote_raw = f.read()
+    else:
+        print(f"   ⚠️ {remote_manifest} absent (à créer avec --update-manifest)")
+    allowed_remote = frozenset(json.loads(remote_raw).get('urls', []) if remote_raw else ())
+    images_path = os.path.join(output_dir, build_images.MANIFEST_FILE)
+    images_raw = b''
+    if os.path.exists(images_path):
+        with open(images_path, 'rb') as f:
+            images_raw = f.read()
+    images_manifest = json.loads(images_raw) if images_raw else {}
+
+    jobs = []
+    keys = {}
+    for page in pages:
+        name = os.path.basename(page)
+        with open(page, 'rb') as f:
+            raw = f.read()
+        is_email = name in EMAIL_PAGES
+        budget = email_budget if is_email else page_budget
+        key = cache_key(raw, is_email, budget, remote_raw, b'' if is_email else images_raw)
+        if cache.get(name, {}).get('key') == key and os.path.exists(os.path.join(pages_dir, name)):
+            continue
+        keys[name] = key
+        jobs.append((name, raw.decode('utf-8'), is_email, budget, allowed_remote, images_manifest))
+
+    print(f"📄 {len(pages)} pages, {len(jobs)} à reconstruire, {len(pages) - len(jobs)} en cache")
+
+    all_errors = []
+    if jobs:
+        with Pool(min(workers or os.cpu_count() or 1, len(jobs))) as pool:
+            results = pool.map(build_page, jobs)
+        for name, content, errors in results:
+            with open(os.path.join(pages_dir, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+            size = len(content.encode('utf-8'))
+            if errors:
+                cache.pop(name, None)
+                all_errors.extend(f"{name}: {error}" for error in errors)
+                print(f"   ❌ {name} ({size} octets)")
+            else:
+                cache[name] = {'key': keys[name], 'bytes': size}
+                print(f"   ✅ {name} ({size} octets)")
+
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=1)
+
+    return all_errors
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Build des pages HTML")
+    parser.add_argument('pages', nargs='*', help=f"pages à construire (défaut: {PAGES_DIR}/*.html)")
+    parser.add_argument('--output', default=OUTPUT_DIR, help=f"dossier de sortie (défaut: {OUTPUT_DIR})")
+    parser.add_argument('--manifest', default=REMOTE_MANIFEST, help="manifeste des src distants autorisés")
+    parser.add_argument('--update-manifest', action='store_true', help="ajoute les src distants trouvés au manifeste")
+    parser.add_argument('--email-budget', type=int, default=EMAIL_BUDGET, help="octets max par email")
+    parser.add_argument('--page-budget', type=int, default=PAGE_BUDGET, help="octets max par landing page")
+    parser.add_argument('--workers', type=int, default=None, help="processus (défaut: nb de CPU)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    pages = args.pages or sorted(glob.glob(os.path.join(PAGES_DIR, '*.html')))
+    if args.update_manifest:
+        update_remote_manifest(pages, args.manifest)
+
+    errors = build_all(pages, args.output, args.manifest, args.email_budget, args.page_budget, args.workers)
+    print(f"🏁 Terminé en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    if errors:
+        print("\n❌ Erreurs:")
+        for error in errors:
+            print(f"   {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
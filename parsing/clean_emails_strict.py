@@ -1,20 +1,19 @@
-#!/usr/bin/env python3
 """
 Nettoyage STRICT des emails - supprime tout ce qui est douteux
 """
 
-import csv
 import re
 import smtplib
-from typing import Any
-import dns.resolver
 import socket
 from collections import defaultdict
 
+from . import trace
+from .club import read_sarbacane, write_sarbacane
+from .lazy import require
+
 FILE = "bdd_club/auto/Base Club Auto.csv"
 OUTPUT_VALID = "bdd_club/auto/Base Club Auto - Clean.csv"
 OUTPUT_NPAI = "bdd_club/auto/npai.csv"
-DELIMITER = ";"
 
 EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
@@ -36,16 +35,19 @@ TRUSTED_PROVIDERS = {
 }
 
 
+@trace.traced('clean.dns')
 def get_mx_host(domain: str) -> str:
     """Récupère le serveur MX principal du domaine"""
+    resolver = require('dns.resolver')
     try:
-        records = dns.resolver.resolve(domain, 'MX', lifetime=5)
+        records = resolver.resolve(domain, 'MX', lifetime=5)
         mx_record = sorted(records, key=lambda x: x.preference)[0]
         return str(mx_record.exchange).rstrip('.')
     except:
         return None
 
 
+@trace.traced('clean.smtp')
 def verify_email_smtp(email: str, mx_host: str) -> tuple[bool, str]:
     """Vérifie si l'email existe via SMTP - MODE STRICT"""
     try:
@@ -120,15 +122,9 @@ def validate_email(email: str, mx_cache: dict, smtp_results: dict) -> tuple[bool
     return smtp_results[email]
 
 
-def main():
-    print(f"📧 Lecture: {FILE}")
+def clean(rows, output_valid=OUTPUT_VALID, output_npai=OUTPUT_NPAI):
+    """Valide chaque club, écrit la base propre et les NPAI, renvoie les clubs valides"""
     print("🔒 MODE STRICT ACTIVÉ - Suppression de tout ce qui est douteux\n")
-    
-    with open(FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f, delimiter=DELIMITER)
-        fieldnames = reader.fieldnames
-        rows = list(reader)
-    
     print(f"📊 {len(rows)} lignes à traiter")
     
     mx_cache = {}
@@ -137,35 +133,31 @@ def main():
     npai_rows = []
     stats = defaultdict(int)
     
-    for i, row in enumerate[dict[str | Any, str | Any]](rows):
-        email = row.get('Email', '').strip()
+    for i, row in enumerate(rows):
+        email = row.email.strip()
         is_valid, reason = validate_email(email, mx_cache, smtp_results)
         
         if is_valid:
             valid_rows.append(row)
             stats['valides'] += 1
+            trace.count('clean.valid')
         else:
-            row['raison'] = reason
+            row.raison = reason
             npai_rows.append(row)
             stats[reason] += 1
+            trace.count('clean.npai')
         
         if (i + 1) % 100 == 0:
             pct_clean = (stats['valides'] / (i+1)) * 100
             print(f"  {i+1}/{len(rows)} - Valides: {stats['valides']} ({pct_clean:.0f}%) - NPAI: {len(npai_rows)}")
     
     # Écrire fichier nettoyé
-    with open(OUTPUT_VALID, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=DELIMITER)
-        writer.writeheader()
-        writer.writerows(valid_rows)
-    
-    # Écrire NPAI
-    if npai_rows:
-        npai_fields = list(fieldnames) + ['raison']
-        with open(OUTPUT_NPAI, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=npai_fields, delimiter=DELIMITER)
-            writer.writeheader()
-            writer.writerows(npai_rows)
+    with trace.span('clean.write'):
+        write_sarbacane(valid_rows, output_valid)
+        
+        # Écrire NPAI
+        if npai_rows:
+            write_sarbacane(npai_rows, output_npai, npai=True)
     
     # Stats finales
     pct_valid = (stats['valides'] / len(rows)) * 100
@@ -177,13 +169,23 @@ def main():
     print(f"📊 Total initial:    {len(rows)}")
     print(f"✅ Emails valides:   {stats['valides']} ({pct_valid:.1f}%)")
     print(f"❌ NPAI supprimés:   {len(npai_rows)} ({pct_npai:.1f}%)")
-    print(f"\n📁 Fichier propre: {OUTPUT_VALID}")
-    print(f"📁 NPAI sauvés:    {OUTPUT_NPAI}")
+    print(f"\n📁 Fichier propre: {output_valid}")
+    print(f"📁 NPAI sauvés:    {output_npai}")
     
     print(f"\n📋 Détail des suppressions:")
     for reason, count in sorted(stats.items(), key=lambda x: -x[1]):
         if reason != 'valides':
             print(f"   {reason}: {count}")
+    
+    return valid_rows
+
+
+def main(input_file=FILE, output_valid=OUTPUT_VALID, output_npai=OUTPUT_NPAI):
+    print(f"📧 Lecture: {input_file}")
+    
+    rows = read_sarbacane(input_file)
+    
+    return clean(rows, output_valid, output_npai)
 
 
 if __name__ == "__main__":
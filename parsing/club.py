@@ -0,0 +1,447 @@
+"""
+=============================================================================
+ENREGISTREMENT CLUB - Format commun à toutes les étapes
+=============================================================================
+
+Un club = un objet Club à __slots__, quel que soit le fichier d'origine.
+Les noms de champs sont unifiés :
+
+    lva-auto.csv      retrocalage.csv    Base Sarbacane      Club
+    -------------     ---------------    ----------------    ------------
+    id                                                       id
+    nom               nom                nom                 nom
+    adresse           adresse            adresse             adresse
+    telephone         telephone          N° de mobile        telephone
+    email             email              Email               email
+    bureau            representant       representant        representant
+    site_internet     site               site                site
+    lien                                                     lien
+                                         Source              source
+                                         Score d'engagement  score
+                                         raison (npai.csv)   raison
+
+La ville et le département sont déduits de l'adresse à la lecture de
+l'attribut, sans être stockés : sur des adresses distinctes (le cas réel,
+2 285 adresses pour 2 555 clubs), les garder coûtait plus que le dict
+évité. Les valeurs très répétées (source, raison) sont partagées.
+
+Codecs : read_source / write_source (CSV des annuaires), read_sarbacane /
+write_sarbacane (base et NPAI, séparateur ;). La lecture passe par
+csv.reader et un itemgetter par fichier, sans dict intermédiaire.
+
+Benchmark mémoire (dicts csv.DictReader vs Club), sur des annuaires
+synthétiques aux lignes distinctes, ou en recyclant une base réelle:
+    python3 -m parsing.club
+    python3 -m parsing.club --count 1000000
+    python3 -m parsing.club --base "bdd_club/auto/Base Club Auto.csv"
+
+Vérification aller-retour des codecs sur les fichiers du dépôt (relus puis
+réécrits, ils doivent être identiques octet pour octet):
+    python3 -m parsing.club --check
+
+=============================================================================
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import lru_cache
+from itertools import cycle, islice
+from operator import itemgetter
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+LVA = "lva-auto.csv"
+RETRO = "retrocalage.csv"
+DELIMITER = ";"
+SOURCE_PREFIX = "File : "
+
+LVA_FIELDNAMES = ['id', 'nom', 'adresse', 'telephone', 'email', 'bureau', 'site_internet', 'lien']
+RETRO_FIELDNAMES = ['nom', 'adresse', 'representant', 'telephone', 'email', 'site']
+SARBACANE_FIELDNAMES = ['Email', 'N° de mobile', 'Score d\'engagement', 'Source', 'site', 'representant', 'adresse', 'nom']
+NPAI_FIELDNAMES = SARBACANE_FIELDNAMES + ['raison']
+
+# Colonne des fichiers sources -> attribut du Club
+SOURCE_COLUMNS = {
+    'id': 'id',
+    'nom': 'nom',
+    'adresse': 'adresse',
+    'telephone': 'telephone',
+    'email': 'email',
+    'bureau': 'representant',
+    'representant': 'representant',
+    'site_internet': 'site',
+    'site': 'site',
+    'lien': 'lien',
+}
+
+# Colonne Sarbacane -> attribut du Club
+SARBACANE_COLUMNS = {
+    'Email': 'email',
+    'N° de mobile': 'telephone',
+    'Score d\'engagement': 'score',
+    'Source': 'source',
+    'site': 'site',
+    'representant': 'representant',
+    'adresse': 'adresse',
+    'nom': 'nom',
+    'raison': 'raison',
+}
+
+CP_REGEX = re.compile(r'\b(\d{5})\b')
+# 'Pdt', 'Pdte', 'Pdts', 'Co-Pdts', 'Pdt et Trés.', 'Pdt fondateur' ; pas 'Vice-Pdt' ni 'Pdt d'honneur'
+PRESIDENT_ROLE_REGEX = re.compile(r"^(?:co-)?pdte?s?\.?(?!\s*d['’]honneur)(?:\s+(?:et\b|fondat)|\s*$)", re.IGNORECASE)
+COUNTRY_REGEX = re.compile(r'\s+-\s+France\s*$', re.IGNORECASE)
+
+intern = sys.intern
+
+
+# =============================================================================
+# ADRESSES
+# =============================================================================
+
+@lru_cache(maxsize=4096)
+def localisation(adresse):
+    """
+    (ville, département) d'une adresse ; cache borné, les clubs d'une même
+    commune se suivent souvent.
+    '77140 Saint-Pierre-lès-Nemours - France' -> ('Saint-Pierre-lès-Nemours', '77')
+    Département : 2A/2B pour la Corse, 97x pour les DOM.
+    """
+    match = CP_REGEX.search(adresse or '')
+    if not match:
+        return '', ''
+    cp = match.group(1)
+    if cp.startswith(('97', '98')):
+        dept = cp[:3]
+    elif cp.startswith('20'):
+        dept = '2A' if cp < '20200' else '2B'
+    else:
+        dept = cp[:2]
+    return intern(COUNTRY_REGEX.sub('', adresse[match.end():]).strip()), intern(dept)
+
+
+def clear_places():
+    """Vide le cache des localisations (entre deux passages d'un processus long)."""
+    localisation.cache_clear()
+
+
+def departement(adresse):
+    """Extrait le département du code postal (2A/2B pour la Corse, 97x DOM)."""
+    return localisation(adresse)[1]
+
+
+def president(representant):
+    """
+    Nom du président d'après le champ bureau / representant :
+    'Pdt : Olivier Morin ; Vice-Pdt : Bruno Grégoire' -> 'Olivier Morin'.
+    Un champ court sans rôle est pris pour un nom ; sinon ''.
+    """
+    parts = [part.strip() for part in representant.split(';') if part.strip()]
+    name = ''
+    for part in parts:
+        role, sep, value = part.partition(':')
+        if sep and PRESIDENT_ROLE_REGEX.match(role.replace('\xa0', ' ').strip()):
+            name = ' '.join(value.split())
+            break
+    else:
+        if len(parts) == 1 and ':' not in parts[0] and len(parts[0].split()) <= 4:
+            name = ' '.join(parts[0].split())
+    if 'Ã' in name:
+        # UTF-8 relu en latin-1 par l'annuaire ('Ã\x89ric' -> 'Éric')
+        try:
+            name = name.encode('latin-1').decode('utf-8')
+        except UnicodeError:
+            pass
+    return name
+
+
+def format_phone(phone):
+    """Formate le téléphone en format international"""
+    if not phone:
+        return ""
+    # Nettoyer
+    phone = re.sub(r'[^\d]', '', phone)
+    # Format français -> international
+    if phone.startswith('0') and len(phone) == 10:
+        phone = '33' + phone[1:]
+    return phone
+
+
+# =============================================================================
+# ENREGISTREMENT
+# =============================================================================
+
+class Club:
+    """Un club, toutes sources confondues (voir le tableau des champs en tête de module)."""
+
+    __slots__ = ('nom', 'adresse', 'telephone', 'email', 'representant', 'site',
+                 'id', 'lien', 'source', 'score', 'raison')
+
+    # Ordre des arguments positionnels
+    FIELDS = __slots__
+    # Champs lisibles, dérivés compris (adresse, bureau)
+    ATTRIBUTES = FIELDS + ('ville', 'dept', 'president')
+
+    def __init__(self, nom='', adresse='', telephone='', email='', representant='', site='',
+                 id='', lien='', source='', score='', raison=''):
+        self.nom = nom
+        self.adresse = adresse
+        self.telephone = telephone
+        self.email = email
+        self.representant = representant
+        self.site = site
+        self.id = id
+        self.lien = lien
+        self.source = intern(source)
+        self.score = score
+        self.raison = intern(raison)
+
+    def __repr__(self):
+        return f"Club({self.nom!r}, email={self.email!r}, source={self.source!r})"
+
+    @property
+    def ville(self):
+        return localisation(self.adresse)[0]
+
+    @property
+    def dept(self):
+        return localisation(self.adresse)[1]
+
+    @property
+    def president(self):
+        return president(self.representant)
+
+    def replace(self, **changes):
+        """Copie du club avec certains champs modifiés."""
+        values = {name: getattr(self, name) for name in self.FIELDS}
+        values.update(changes)
+        return Club(**values)
+
+    @classmethod
+    def from_row(cls, row, source=''):
+        """Club depuis un dict (sortie des scrapers, DictReader)."""
+        values = {}
+        for column, name in SOURCE_COLUMNS.items():
+            if row.get(column):
+                values[name] = row[column]
+        return cls(source=source, **values)
+
+    def to_source_row(self, fieldnames):
+        """Ligne au schéma d'un annuaire (LVA_FIELDNAMES ou RETRO_FIELDNAMES)."""
+        return [getattr(self, SOURCE_COLUMNS[column]) for column in fieldnames]
+
+    def to_sarbacane_row(self, npai=False):
+        row = [self.email, format_phone(self.telephone), self.score, SOURCE_PREFIX + self.source,
+               self.site, self.representant, self.adresse, self.nom]
+        if npai:
+            row.append(self.raison)
+        return row
+
+
+def from_rows(rows, source=''):
+    return [Club.from_row(row, source) for row in rows]
+
+
+# =============================================================================
+# CODECS CSV
+# =============================================================================
+
+def _row_reader(header, columns, defaults):
+    """
+    Prépare le décodage des lignes d'un fichier : renvoie (getter, largeur,
+    fin de ligne). Les lignes sont tronquées à la largeur de l'en-tête puis
+    complétées par la fin de ligne, qui contient les valeurs par défaut des
+    champs absents du fichier ; le getter renvoie alors les valeurs dans
+    l'ordre de Club.FIELDS.
+    """
+    positions = {columns[column]: i for i, column in enumerate(header) if column in columns}
+    width = len(header)
+    tail = ['']
+    for name, value in defaults.items():
+        if name not in positions:
+            positions[name] = width + len(tail)
+            tail.append(value)
+    getter = itemgetter(*(positions.get(name, width) for name in Club.FIELDS))
+    return getter, width, tail
+
+
+def decode_source(lines, source=''):
+    """Clubs depuis les lignes d'un CSV d'annuaire (en-tête compris)."""
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if not header:
+        return
+    getter, width, tail = _row_reader(header, SOURCE_COLUMNS, {'source': source})
+    for row in reader:
+        if len(row) != width:
+            row = (row + [''] * width)[:width]
+        yield Club(*getter(row + tail))
+
+
+def decode_sarbacane(lines, default_raison=''):
+    """
+    Clubs depuis les lignes d'une base Sarbacane ou d'un npai.csv.
+    default_raison s'applique aux fichiers sans colonne raison.
+    """
+    reader = csv.reader(lines, delimiter=DELIMITER)
+    header = next(reader, None)
+    if not header:
+        return
+    getter, width, tail = _row_reader(header, SARBACANE_COLUMNS, {'raison': default_raison})
+    source_pos = header.index('Source') if 'Source' in header else width
+    sources = {'': ''}
+    for row in reader:
+        if len(row) != width:
+            row = (row + [''] * width)[:width]
+        row += tail
+        # 'File : lva-auto.csv' -> 'lva-auto.csv'
+        source = row[source_pos]
+        short = sources.get(source)
+        if short is None:
+            short = sources[source] = intern(source[len(SOURCE_PREFIX):] if source.startswith(SOURCE_PREFIX) else source)
+        row[source_pos] = short
+        yield Club(*getter(row))
+
+
+def read_source(path, source=None):
+    """Charge lva-auto.csv / retrocalage.csv (source = nom du fichier par défaut)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(decode_source(f, source if source is not None else os.path.basename(path)))
+
+
+def read_sarbacane(path, default_raison=''):
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(decode_sarbacane(f, default_raison))
+
+
+def write_source(clubs, path, fieldnames, mode='w'):
+    """Écrit des clubs au schéma d'un annuaire ; mode='a' ajoute sans en-tête."""
+    header = mode == 'w' or not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, mode, newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(fieldnames)
+        writer.writerows(club.to_source_row(fieldnames) for club in clubs)
+
+
+def write_sarbacane(clubs, path, npai=False, mode='w'):
+    """Écrit la base (ou npai.csv avec la colonne raison) au format Sarbacane ; mode='a' ajoute."""
+    header = mode == 'w' or not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, mode, newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=DELIMITER)
+        if header:
+            writer.writerow(NPAI_FIELDNAMES if npai else SARBACANE_FIELDNAMES)
+        writer.writerows(club.to_sarbacane_row(npai) for club in clubs)
+
+
+# =============================================================================
+# VÉRIFICATION DES CODECS
+# =============================================================================
+
+DATA_DIR = "bdd_club/auto"
+
+# fichier -> (lecture, écriture) ; chaque fichier relu puis réécrit doit être identique
+ROUNDTRIPS = {
+    LVA: (read_source, lambda clubs, path: write_source(clubs, path, LVA_FIELDNAMES)),
+    RETRO: (read_source, lambda clubs, path: write_source(clubs, path, RETRO_FIELDNAMES)),
+    "Base Club Auto.csv": (read_sarbacane, write_sarbacane),
+    "npai.csv": (read_sarbacane, lambda clubs, path: write_sarbacane(clubs, path, npai=True)),
+}
+
+
+def check_roundtrip(data_dir=DATA_DIR):
+    """Relit et réécrit chaque fichier présent ; renvoie True si tous sont identiques."""
+    ok = True
+    with tempfile.TemporaryDirectory(prefix="club-check-") as work_dir:
+        for name, (read, write) in ROUNDTRIPS.items():
+            path = os.path.join(data_dir, name)
+            if not os.path.exists(path):
+                print(f"   ⏭️  {name} absent")
+                continue
+            copy = os.path.join(work_dir, name)
+            clubs = read(path)
+            write(clubs, copy)
+            with open(path, 'rb') as f, open(copy, 'rb') as g:
+                same = f.read() == g.read()
+            ok &= same
+            print(f"   {'✅' if same else '❌'} {name} ({len(clubs)} clubs)")
+    return ok
+
+
+# =============================================================================
+# BENCHMARK MÉMOIRE
+# =============================================================================
+
+def sample_lines(path, count):
+    """En-tête + `count` lignes de données, en recyclant celles du fichier."""
+    with open(path, 'r', encoding='utf-8') as f:
+        header, *lines = f.readlines()
+    return [header] + list(islice(cycle(lines), count))
+
+
+def synthetic_lines(count, seed=0):
+    """En-tête + `count` lignes lva-auto.csv toutes distinctes (synthetic.py, sans doublons)."""
+    from . import synthetic
+    with tempfile.TemporaryDirectory(prefix="club-bench-") as work_dir:
+        lva_file, _ = synthetic.write(count, work_dir, seed=seed, dup_rate=0, lva_share=1.0)
+        with open(lva_file, 'r', encoding='utf-8') as f:
+            return f.readlines()
+
+
+def measure(label, build, lines):
+    """Mémoire retenue par les enregistrements construits depuis `lines`."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = build(lines)
+    duration = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(records)
+    print(f"   {label:<22} {current / 1e6:>9.1f} Mo  {current / count:>6.0f} o/club  "
+          f"{count / duration:>9.0f} clubs/s")
+    del records
+    return current
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Mémoire des enregistrements: dicts vs Club")
+    parser.add_argument('--count', type=int, default=100_000, help="nombre d'enregistrements (défaut: 100k)")
+    parser.add_argument('--check', action='store_true', help="vérifie l'aller-retour des codecs sur les fichiers du dépôt")
+    parser.add_argument('--data-dir', default=DATA_DIR, help=f"dossier des fichiers à vérifier (défaut: {DATA_DIR})")
+    parser.add_argument('--base', help="base Sarbacane à recycler au lieu des lignes synthétiques "
+                                       "(lignes répétées : le partage des valeurs y est surestimé)")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        print(f"🔁 Aller-retour des codecs sur {args.data_dir}")
+        if not check_roundtrip(args.data_dir):
+            sys.exit(1)
+        return
+
+    if args.base:
+        lines = sample_lines(args.base, args.count)
+        print(f"🧮 {args.count} enregistrements recyclés depuis {args.base}")
+        dicts = measure("dict (DictReader)", lambda l: list(csv.DictReader(l, delimiter=DELIMITER)), lines)
+        clubs = measure("Club (decode_sarbacane)", lambda l: list(decode_sarbacane(l)), lines)
+    else:
+        lines = synthetic_lines(args.count)
+        print(f"🧮 {args.count} enregistrements lva-auto synthétiques distincts")
+        dicts = measure("dict (DictReader)", lambda l: list(csv.DictReader(l)), lines)
+        clubs = measure("Club (decode_source)", lambda l: list(decode_source(l, LVA)), lines)
+
+    per_million = 1_000_000 / args.count
+    print(f"\n📉 Par million de clubs: {dicts * per_million / 1e6:.0f} Mo -> "
+          f"{clubs * per_million / 1e6:.0f} Mo ({clubs / dicts:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+=============================================================================
+CRAWL DES SITES DE CLUBS - Récupération des emails manquants
+=============================================================================
+
+Beaucoup de clubs ont un site mais pas d'email dans lva-auto.csv /
+retrocalage.csv : rebuild_base.py les écarte. Ce module visite leurs sites
+(page d'accueil + pages contact uniquement) et cherche une adresse :
+liens mailto:, emails protégés par Cloudflare, texte de la page.
+
+Coût borné :
+- quelques pages par site (MAX_PAGES), réponses tronquées à MAX_BYTES
+- robots.txt respecté, au plus une requête par seconde et par domaine
+- cache disque des réponses (CACHE_TTL) : un second passage ne refait
+  aucune requête
+
+Résultat : emails_sites.csv (site -> email), relu par rebuild_base.py.
+
+Usage:
+    python3 -m parsing crawl
+    python3 -m parsing crawl --workers 16 --max-sites 100
+
+=============================================================================
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+from . import trace
+from .club import read_source
+from .lazy import require
+from .ratelimit import DomainRateLimiter
+from .scrape_lva_clubs import HEADERS, decode_cloudflare_email
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+LVA_FILE = "bdd_club/auto/lva-auto.csv"
+RETRO_FILE = "bdd_club/auto/retrocalage.csv"
+OUTPUT_FILE = "bdd_club/auto/emails_sites.csv"
+CACHE_DIR = "bdd_club/auto/.crawl-cache"
+CACHE_TTL = 30 * 24 * 3600     # secondes
+WORKERS = 8
+DOMAIN_RATE = 1.0              # requêtes/s par domaine
+MAX_PAGES = 4                  # accueil + pages contact
+MAX_BYTES = 1_000_000
+TIMEOUT = 10
+USER_AGENT = HEADERS['User-Agent']
+
+# Sites qu'il est inutile (ou interdit) de crawler
+SKIP_DOMAINS = {
+    'facebook.com', 'fb.com', 'instagram.com', 'twitter.com', 'x.com',
+    'youtube.com', 'linkedin.com', 'google.com', 'sites.google.com',
+}
+
+CONTACT_REGEX = re.compile(r'contact|nous-(?:joindre|ecrire)|ecrivez|mentions|a-propos|qui-sommes|bureau', re.I)
+LINK_REGEX = re.compile(r'<a\b[^>]*?href\s*=\s*["\']([^"\']+)["\'][^>]*>(.*?)</a>', re.I | re.S)
+MAILTO_REGEX = re.compile(r'mailto:([^"\'?>\s]+)', re.I)
+CFEMAIL_REGEX = re.compile(r'data-cfemail\s*=\s*["\']([0-9a-fA-F]+)["\']|/cdn-cgi/l/email-protection#([0-9a-fA-F]+)')
+EMAIL_REGEX = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+TAG_REGEX = re.compile(r'<[^>]+>')
+
+# Faux positifs fréquents (images retina, outils des CMS)
+IGNORED_EMAIL_REGEX = re.compile(
+    r'\.(?:png|jpe?g|gif|webp|svg)$|@(?:sentry|wixpress|example)\.|^(?:no-?reply|nepasrepondre)@', re.I)
+
+
+# =============================================================================
+# HTTP : cache, robots.txt, politesse
+# =============================================================================
+
+class Fetcher:
+    """
+    GET partagé entre threads : cache disque, robots.txt par domaine et
+    limite de débit par domaine.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, domain_rate=DOMAIN_RATE):
+        self.cache_dir = cache_dir
+        self.limiter = DomainRateLimiter(domain_rate)
+        self.robots = {}
+        self.robots_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.local = threading.local()
+        self.requests = 0
+        self.cache_hits = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            requests = require('requests')
+            session = self.local.session = requests.Session()
+            session.headers.update(HEADERS)
+        return session
+
+    def cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def fetch(self, url, check_robots=True):
+        """Renvoie (status, url finale, texte) ; status 0 en cas d'erreur réseau."""
+        path = self.cache_path(url)
+        try:
+            if time.time() - os.path.getmtime(path) < CACHE_TTL:
+                with open(path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                with self.stats_lock:
+                    self.cache_hits += 1
+                return cached['status'], cached['url'], cached['text']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        if check_robots and not self.allowed(url):
+            return 0, url, ''
+
+        self.limiter.acquire(urlparse(url).netloc.lower())
+        with self.stats_lock:
+            self.requests += 1
+        status, final_url, text = 0, url, ''
+        try:
+            with self.session().get(url, timeout=TIMEOUT, stream=True) as response:
+                status, final_url = response.status_code, response.url
+                content_type = response.headers.get('Content-Type', '')
+                if 'html' in content_type or 'text' in content_type or not content_type:
+                    raw = bytearray()
+                    for chunk in response.iter_content(65536):
+                        raw += chunk
+                        if len(raw) >= MAX_BYTES:
+                            break
+                    text = raw.decode(response.encoding or 'utf-8', errors='replace')
+        except Exception:
+            # Erreur réseau : pas mise en cache, on retentera au prochain passage
+            return 0, url, ''
+
+        # 429 / 5xx sont passagers : seules les réponses stables sont mises en cache
+        if 200 <= status < 300 or status in (404, 410):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'status': status, 'url': final_url, 'text': text}, f)
+        return status, final_url, text
+
+    def allowed(self, url):
+        """
+        robots.txt du domaine (lu une fois), selon la RFC 9309 : absent (4xx)
+        = tout autorisé, injoignable (5xx, erreur réseau) = tout interdit.
+        """
+        parsed = urlparse(url)
+        root = f"{parsed.scheme}://{parsed.netloc}"
+        with self.robots_lock:
+            parser = self.robots.get(root)
+        if parser is None:
+            status, _, text = self.fetch(root + '/robots.txt', check_robots=False)
+            parser = RobotFileParser()
+            if status in (401, 403):
+                parser.disallow_all = True
+            elif 200 <= status < 300:
+                parser.parse(text.splitlines())
+            elif status == 0 or status >= 500:
+                parser.disallow_all = True
+            else:
+                parser.allow_all = True
+            with self.robots_lock:
+                self.robots[root] = parser
+        return parser.can_fetch(USER_AGENT, url)
+
+
+# =============================================================================
+# EXTRACTION
+# =============================================================================
+
+def normalize_site(site):
+    site = (site or '').strip()
+    if site and not re.match(r'^https?://', site, re.I):
+        site = 'http://' + site
+    return site
+
+
+def site_domain(url):
+    domain = urlparse(url).netloc.lower().split(':')[0]
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+def should_skip(site):
+    domain = site_domain(site)
+    return not domain or any(domain == d or domain.endswith('.' + d) for d in SKIP_DOMAINS)
+
+
+def extract_emails(html):
+    """Emails d'une page, par ordre de fiabilité : mailto, Cloudflare, texte."""
+    found = []
+    found += [unquote(email) for email in MAILTO_REGEX.findall(html)]
+    for attr, href in CFEMAIL_REGEX.findall(html):
+        found.append(decode_cloudflare_email(attr or href))
+    found += EMAIL_REGEX.findall(TAG_REGEX.sub(' ', html))
+
+    emails = []
+    for email in found:
+        email = email.strip().strip('.').lower()
+        if EMAIL_REGEX.fullmatch(email) and not IGNORED_EMAIL_REGEX.search(email) and email not in emails:
+            emails.append(email)
+    return emails
+
+
+def contact_links(html, base_url):
+    """Liens internes qui ressemblent à une page contact, les plus probables d'abord."""
+    domain = site_domain(base_url)
+    links = []
+    for href, label in LINK_REGEX.findall(html):
+        url = urljoin(base_url, href.strip()).split('#')[0]
+        if not url.startswith('http') or site_domain(url) != domain:
+            continue
+        text = TAG_REGEX.sub(' ', label)
+        if CONTACT_REGEX.search(href) or CONTACT_REGEX.search(text):
+            score = 0 if 'contact' in (href + text).lower() else 1
+            links.append((score, url))
+    seen = set()
+    return [url for _, url in sorted(links) if not (url in seen or seen.add(url))]
+
+
+def best_email(emails, site):
+    """Privilégie une adresse du domaine du site, sinon la première trouvée."""
+    domain = site_domain(site)
+    for email in emails:
+        if email.endswith('@' + domain):
+            return email
+    return emails[0] if emails else ''
+
+
+@trace.traced('crawl.site')
+def crawl_site(fetcher, site):
+    """Visite l'accueil puis les pages contact ; renvoie (email, page) ou ('', '')."""
+    status, final_url, html = fetcher.fetch(site)
+    if status != 200 or not html:
+        return '', ''
+    emails = extract_emails(html)
+    if emails:
+        return best_email(emails, site), final_url
+    for url in contact_links(html, final_url)[:MAX_PAGES - 1]:
+        status, page_url, page = fetcher.fetch(url)
+        if status == 200:
+            emails = extract_emails(page)
+            if emails:
+                return best_email(emails, site), page_url
+    return '', ''
+
+
+# =============================================================================
+# CRAWL
+# =============================================================================
+
+def sites_without_email(lva_rows, retro_rows):
+    """Sites à crawler : clubs avec site mais sans email, dédoublonnés."""
+    sites = {}
+    for rows, source in ((lva_rows, 'lva-auto'), (retro_rows, 'retrocalage')):
+        for club in rows:
+            site = normalize_site(club.site)
+            if site and not club.email.strip() and not should_skip(site):
+                sites.setdefault(site, source)
+    return sites
+
+
+def crawl(lva_rows, retro_rows, workers=WORKERS, max_sites=None, cache_dir=CACHE_DIR):
+    """Crawle les sites en parallèle ; renvoie {site: email}."""
+    sites = sites_without_email(lva_rows, retro_rows)
+    targets = list(sites)[:max_sites] if max_sites else list(sites)
+    print(f"🕸️  {len(targets)} sites à visiter ({len(sites)} clubs avec site sans email)")
+
+    fetcher = Fetcher(cache_dir)
+    found = {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        for i, (site, (email, page)) in enumerate(zip(targets, pool.map(lambda s: crawl_site(fetcher, s), targets))):
+            if email:
+                found[site] = (sites[site], email, page)
+            if (i + 1) % 50 == 0:
+                print(f"  {i+1}/{len(targets)} - ✉️ {len(found)} emails")
+
+    duration = time.perf_counter() - start
+    print(f"✅ {len(found)} emails trouvés - {fetcher.requests} requêtes, "
+          f"{fetcher.cache_hits} en cache, {duration:.1f}s")
+    return found
+
+
+def save_csv(found, output_file=OUTPUT_FILE):
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['site', 'source', 'email', 'page'])
+        for site, (source, email, page) in found.items():
+            writer.writerow([site, source, email, page])
+    print(f"💾 {output_file}")
+
+
+def load_csv(path=OUTPUT_FILE):
+    """{site normalisé: email} depuis emails_sites.csv (vide si absent)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {row['site']: row['email'] for row in csv.DictReader(f) if row.get('email')}
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None, prog=None, lva_file=LVA_FILE, retro_file=RETRO_FILE,
+         output_file=OUTPUT_FILE, cache_dir=CACHE_DIR):
+    parser = argparse.ArgumentParser(prog=prog, description="Crawl des sites de clubs sans email")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="requêtes simultanées (domaines différents)")
+    parser.add_argument('--max-sites', type=int, default=None, help="limite le nombre de sites visités")
+    args = parser.parse_args(argv)
+
+    found = crawl(read_source(lva_file), read_source(retro_file), args.workers, args.max_sites,
+                  cache_dir)
+    save_csv(found, output_file)
+    return {site: email for site, (_, email, _) in found.items()}
+
+
+if __name__ == "__main__":
+    main()
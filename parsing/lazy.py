@@ -0,0 +1,25 @@
+"""
+Import paresseux des dépendances lourdes (selenium, requests, bs4, dnspython,
+pillow).
+
+Les modules ne sont importés qu'à la première utilisation : `python -m parsing`
+démarre vite et une étape qui n'a pas besoin de Selenium tourne même s'il
+n'est pas installé.
+"""
+
+import importlib
+
+PIP_NAMES = {
+    'PIL': 'pillow',
+    'bs4': 'beautifulsoup4',
+    'dns': 'dnspython',
+}
+
+
+def require(module):
+    """Importe `module` (mis en cache par sys.modules) ou quitte avec un message clair."""
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        package = module.split('.')[0]
+        raise SystemExit(f"❌ Module manquant: {e}\n   pip3 install {PIP_NAMES.get(package, package)}")
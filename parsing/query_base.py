@@ -0,0 +1,254 @@
+"""
+=============================================================================
+REQUÊTES SUR LA BASE CLUB - Export de segments Sarbacane
+=============================================================================
+
+Construit des index (source, département, raison, présence des champs) sur
+la base nettoyée, les persiste à côté du CSV, puis exporte les lignes qui
+correspondent aux filtres au format d'import Sarbacane (séparateur ;).
+
+Les index ne sont reconstruits que si un fichier source a changé : les
+exports successifs ne relisent pas le CSV.
+
+Filtres (combinés en ET, valeurs séparées par des virgules combinées en OU):
+    source=lva-auto           source du contact (lva-auto, retrocalage)
+    dept=77,91                département (extrait du code postal)
+    raison=ok                 validité email (ok, no_mx, reject_550...)
+    source!=retrocalage       négation
+    has:site / no:mobile      présence / absence d'un champ
+
+Usage:
+    python3 -m parsing query source=lva-auto dept=07,26 has:site
+    python3 -m parsing query --npai raison=no_mx -o segment.csv
+    python3 -m parsing query --count no:mobile
+
+=============================================================================
+"""
+
+import argparse
+import csv
+import os
+import pickle
+import re
+import sys
+from collections import defaultdict
+
+from .club import DELIMITER, SARBACANE_FIELDNAMES, read_sarbacane
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+FILE = "bdd_club/auto/Base Club Auto - Clean.csv"
+FILE_NPAI = "bdd_club/auto/npai.csv"
+INDEX_SUFFIX = ".index.pickle"
+INDEX_VERSION = 3
+
+# Champs utilisables avec has: / no: -> attribut du Club
+PRESENCE_FIELDS = {
+    'email': 'email',
+    'mobile': 'telephone',
+    'telephone': 'telephone',
+    'site': 'site',
+    'representant': 'representant',
+    'adresse': 'adresse',
+    'nom': 'nom',
+}
+
+# Champs indexés par valeur
+VALUE_FIELDS = ('source', 'dept', 'raison')
+
+FILTER_REGEX = re.compile(r'^(\w+)(!?=)(.*)$')
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+def short_source(source):
+    """'File : lva-auto.csv' -> 'lva-auto'"""
+    source = source.strip()
+    if source.startswith('File :'):
+        source = source[len('File :'):].strip()
+    if source.endswith('.csv'):
+        source = source[:-4]
+    return source.lower()
+
+
+def file_signature(path):
+    """Identifie une version d'un fichier (taille + date de modification)."""
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def read_clubs(path, default_raison=None):
+    """Clubs d'un CSV Sarbacane ; default_raison remplace la raison du fichier (base nettoyée = ok)."""
+    clubs = read_sarbacane(path)
+    if default_raison:
+        for club in clubs:
+            club.raison = default_raison
+    return clubs
+
+
+def build_index(rows):
+    """Construit les index valeur -> ids de lignes et champ -> ids présents."""
+    values = {field: defaultdict(set) for field in VALUE_FIELDS}
+    present = {name: set() for name in set(PRESENCE_FIELDS.values())}
+
+    for row_id, club in enumerate(rows):
+        values['source'][short_source(club.source)].add(row_id)
+        values['dept'][club.dept].add(row_id)
+        values['raison'][club.raison].add(row_id)
+        for name in present:
+            if getattr(club, name).strip():
+                present[name].add(row_id)
+
+    return {
+        'values': {field: dict(index) for field, index in values.items()},
+        'present': present,
+    }
+
+
+def load_base(paths, use_cache=True, reindex=False):
+    """
+    Charge la base et ses index. Les index sont persistés à côté du premier
+    fichier (un cache par combinaison de fichiers) et réutilisés tant
+    qu'aucun fichier source n'a changé.
+    """
+    signature = (INDEX_VERSION,) + tuple(file_signature(path) for path, _ in paths)
+    cache_file = paths[0][0] + ''.join('+' + os.path.basename(path) for path, _ in paths[1:]) + INDEX_SUFFIX
+
+    if use_cache and not reindex and os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('signature') == signature:
+                return cached['rows'], cached['index']
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+    print("🔨 Construction des index...", file=sys.stderr)
+    rows = []
+    for path, default_raison in paths:
+        rows.extend(read_clubs(path, default_raison))
+    index = build_index(rows)
+
+    if use_cache:
+        with open(cache_file, 'wb') as f:
+            pickle.dump({'signature': signature, 'rows': rows, 'index': index}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        print(f"   💾 Index sauvegardé: {cache_file}", file=sys.stderr)
+
+    return rows, index
+
+
+# =============================================================================
+# REQUÊTES
+# =============================================================================
+
+def parse_filter(expression):
+    """Transforme 'dept=77,91' en (champ, valeurs, négation)."""
+    if expression.startswith(('has:', 'no:')):
+        kind, _, field = expression.partition(':')
+        name = PRESENCE_FIELDS.get(field.lower())
+        if name is None:
+            raise ValueError(f"champ inconnu: {field} (possibles: {', '.join(sorted(PRESENCE_FIELDS))})")
+        return ('present', name, kind == 'no')
+
+    match = FILTER_REGEX.match(expression)
+    if not match:
+        raise ValueError(f"filtre invalide: {expression}")
+    field, op, raw = match.groups()
+    field = field.lower()
+    if field not in VALUE_FIELDS:
+        raise ValueError(f"champ inconnu: {field} (possibles: {', '.join(VALUE_FIELDS)})")
+    values = [v.strip() for v in raw.split(',')]
+    if field == 'source':
+        values = [short_source(v) for v in values]
+    elif field == 'dept':
+        values = [v.upper().zfill(2) if v else v for v in values]
+    return (field, values, op == '!=')
+
+
+def query(rows, index, filters):
+    """Renvoie les ids des lignes qui satisfont tous les filtres, dans l'ordre du fichier."""
+    include = []
+    exclude = []
+
+    for field, arg, negate in filters:
+        if field == 'present':
+            ids = index['present'][arg]
+        else:
+            field_index = index['values'][field]
+            ids = set().union(*(field_index.get(v, ()) for v in arg))
+        (exclude if negate else include).append(ids)
+
+    if include:
+        include.sort(key=len)
+        universe = set(include[0])
+        for ids in include[1:]:
+            universe &= ids
+    else:
+        universe = set(range(len(rows)))
+
+    for ids in exclude:
+        universe -= ids
+
+    return sorted(universe)
+
+
+def export(rows, ids, out):
+    """Écrit les lignes sélectionnées au format d'import Sarbacane."""
+    writer = csv.writer(out, delimiter=DELIMITER)
+    writer.writerow(SARBACANE_FIELDNAMES)
+    for row_id in ids:
+        writer.writerow(rows[row_id].to_sarbacane_row())
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None, prog=None, base_file=FILE, npai_file=FILE_NPAI):
+    parser = argparse.ArgumentParser(prog=prog, description="Export de segments de la base club")
+    parser.add_argument('filters', nargs='*', help="ex: source=lva-auto dept=77 has:site")
+    parser.add_argument('--base', default=base_file, help=f"base nettoyée (défaut: {base_file})")
+    parser.add_argument('--npai', nargs='?', const=npai_file, default=None,
+                        help=f"inclure aussi les NPAI, avec leur raison (défaut: {npai_file})")
+    parser.add_argument('-o', '--output', help="fichier de sortie (défaut: stdout)")
+    parser.add_argument('--count', action='store_true', help="affiche seulement le nombre de lignes")
+    parser.add_argument('--reindex', action='store_true', help="force la reconstruction des index")
+    parser.add_argument('--no-cache', action='store_true', help="ne pas persister les index")
+    args = parser.parse_args(argv)
+
+    try:
+        filters = [parse_filter(expr) for expr in args.filters]
+    except ValueError as e:
+        parser.error(str(e))
+
+    paths = [(args.base, 'ok')]
+    if args.npai:
+        paths.append((args.npai, None))
+    for path, _ in paths:
+        if not os.path.isfile(path):
+            parser.error(f"fichier introuvable: {path}")
+
+    rows, index = load_base(paths, use_cache=not args.no_cache, reindex=args.reindex)
+    ids = query(rows, index, filters)
+
+    if args.count:
+        print(len(ids))
+        return
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            export(rows, ids, f)
+        print(f"✅ {len(ids)} contacts exportés dans {args.output}", file=sys.stderr)
+    else:
+        export(rows, ids, sys.stdout)
+        print(f"✅ {len(ids)} contacts exportés", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+=============================================================================
+LIMITES DE DÉBIT - Seaux à jetons partagés entre threads
+=============================================================================
+
+Utilisés par l'envoi de campagne (messages/s, global et par domaine
+destinataire) et par le crawl des sites (requêtes/s par domaine).
+
+=============================================================================
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """Seau à jetons partagé entre threads : acquire() bloque le temps nécessaire."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class DomainRateLimiter:
+    """Un seau à jetons par domaine, créé à la demande."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, domain):
+        with self.lock:
+            limiter = self.limiters.get(domain)
+            if limiter is None:
+                limiter = self.limiters[domain] = RateLimiter(self.rate)
+        limiter.acquire()
@@ -1,80 +1,83 @@
-#!/usr/bin/env python3
 """
 Reconstruit Base Club Auto.csv à partir des fichiers sources
 """
 
-import csv
-import re
+from . import crawl_sites, trace
+from .club import read_source, write_sarbacane
 
-def format_phone(phone):
-    """Formate le téléphone en format international"""
-    if not phone:
-        return ""
-    # Nettoyer
-    phone = re.sub(r'[^\d]', '', phone)
-    # Format français -> international
-    if phone.startswith('0') and len(phone) == 10:
-        phone = '33' + phone[1:]
-    return phone
+LVA_FILE = "bdd_club/auto/lva-auto.csv"
+RETRO_FILE = "bdd_club/auto/retrocalage.csv"
+OUTPUT_FILE = "bdd_club/auto/Base Club Auto.csv"
+SITE_EMAILS_FILE = crawl_sites.OUTPUT_FILE
 
-def main():
-    output_file = "bdd_club/auto/Base Club Auto.csv"
+@trace.traced('rebuild.load')
+def load_source(path):
+    """Charge un fichier source (lva-auto.csv, retrocalage.csv) en Club"""
+    return read_source(path)
+
+
+def club_email(club, site_emails):
+    """Email de la fiche, sinon celui trouvé sur le site du club (crawl_sites)"""
+    email = club.email.strip().lower()
+    if not email and site_emails:
+        email = site_emails.get(crawl_sites.normalize_site(club.site), '')
+    return email
+
+
+@trace.traced('rebuild.merge')
+def build_base(lva_rows, retro_rows, site_emails=None):
+    """
+    Fusionne les deux sources, dédoublonnées sur l'email. Les clubs gardés
+    sont ceux des sources, email normalisé sur place (pas de copie).
+    """
     clubs = []
     seen_emails = set()
+    count_sites = 0
     
-    # 1. Charger lva-auto.csv
-    print("📥 Chargement de lva-auto.csv...")
-    with open("bdd_club/auto/lva-auto.csv", 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            email = row.get('email', '').strip().lower()
-            if email and email not in seen_emails:
-                seen_emails.add(email)
-                clubs.append({
-                    'Email': email,
-                    'N° de mobile': format_phone(row.get('telephone', '')),
-                    'Score d\'engagement': '',
-                    'Source': 'File : lva-auto.csv',
-                    'site': row.get('site_internet', ''),
-                    'representant': row.get('bureau', ''),
-                    'adresse': row.get('adresse', ''),
-                    'nom': row.get('nom', '')
-                })
+    # 1. lva-auto.csv
+    print("📥 Fusion de lva-auto.csv...")
+    for club in lva_rows:
+        email = club_email(club, site_emails)
+        if email and email not in seen_emails:
+            seen_emails.add(email)
+            count_sites += not club.email.strip()
+            club.email = email
+            clubs.append(club)
     print(f"   {len(clubs)} clubs chargés")
     
-    # 2. Charger retrocalage.csv
-    print("📥 Chargement de retrocalage.csv...")
+    # 2. retrocalage.csv
+    print("📥 Fusion de retrocalage.csv...")
     count_retro = 0
-    with open("bdd_club/auto/retrocalage.csv", 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            email = row.get('email', '').strip().lower()
-            if email and email not in seen_emails:
-                seen_emails.add(email)
-                count_retro += 1
-                clubs.append({
-                    'Email': email,
-                    'N° de mobile': format_phone(row.get('telephone', '')),
-                    'Score d\'engagement': '',
-                    'Source': 'File : retrocalage.csv',
-                    'site': row.get('site', ''),
-                    'representant': row.get('representant', ''),
-                    'adresse': row.get('adresse', ''),
-                    'nom': row.get('nom', '')
-                })
+    for club in retro_rows:
+        email = club_email(club, site_emails)
+        if email and email not in seen_emails:
+            seen_emails.add(email)
+            count_retro += 1
+            count_sites += not club.email.strip()
+            club.email = email
+            clubs.append(club)
     print(f"   {count_retro} clubs ajoutés")
+    if site_emails:
+        print(f"   dont {count_sites} emails trouvés sur les sites des clubs")
     
-    # 3. Écrire le fichier final
+    return clubs
+
+
+@trace.traced('rebuild.write')
+def write_base(clubs, output_file=OUTPUT_FILE):
+    """Écrit le fichier final au format Sarbacane"""
     print(f"\n📤 Écriture de {output_file}...")
-    fieldnames = ['Email', 'N° de mobile', 'Score d\'engagement', 'Source', 'site', 'representant', 'adresse', 'nom']
-    with open(output_file, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=';')
-        writer.writeheader()
-        writer.writerows(clubs)
+    write_sarbacane(clubs, output_file)
     
     print(f"\n✅ Fichier reconstruit: {len(clubs)} clubs")
 
-if __name__ == "__main__":
-    main()
 
+def main(lva_file=LVA_FILE, retro_file=RETRO_FILE, output_file=OUTPUT_FILE,
+         site_emails_file=SITE_EMAILS_FILE):
+    site_emails = crawl_sites.load_csv(site_emails_file)
+    clubs = build_base(load_source(lva_file), load_source(retro_file), site_emails)
+    write_base(clubs, output_file)
+    return clubs
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+=============================================================================
+RENDU DES EMAILS PERSONNALISÉS - Templates de campagne
+=============================================================================
+
+Compile une seule fois un template HTML (pages/*.html) contenant des
+placeholders, après l'avoir passé par build_pages comme un email (CSS
+inliné, minification, budget d'octets, lignes de 998 octets au plus) :
+c'est ce HTML construit qui part, jamais la source brute. Puis génère un
+message par club de la base nettoyée, en parallèle sur plusieurs processus.
+Le HTML n'est jamais re-parsé : chaque rendu se limite à échapper les
+valeurs et à les intercaler entre des morceaux de HTML déjà encodés en UTF-8.
+
+Placeholders (champs du Club ou colonnes Sarbacane, insensibles à la casse):
+    {{nom}}  {{president}}  {{adresse}}  {{ville}}  {{email}}  {{site}}
+    {{nom|Chers passionnés}}   valeur par défaut si le champ est vide
+
+Le sujet (--subject ou <title> du template) est commun à tous les messages.
+
+Sortie: un fichier .eml par destinataire (--eml DOSSIER) ou une mbox (--mbox).
+
+Usage:
+    python3 -m parsing render --eml out/noel/
+    python3 -m parsing render --template pages/mailing.html --mbox mailing.mbox
+
+=============================================================================
+"""
+
+import argparse
+import html
+import os
+import re
+import time
+from email.header import Header
+from email.utils import formataddr, formatdate, parseaddr
+from multiprocessing import Pool
+
+from .club import SARBACANE_COLUMNS, Club, read_sarbacane
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+TEMPLATE = "pages/email-noel-2025.html"
+FILE = "bdd_club/auto/Base Club Auto - Clean.csv"
+FROM = "Domaine des Bains <contact@domainedesbains.com>"
+CHUNK_SIZE = 500
+
+PLACEHOLDER_REGEX = re.compile(r'\{\{\s*([\w\' °-]+?)\s*(?:\|([^}]*))?\}\}')
+TITLE_REGEX = re.compile(r'<title>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+MBOX_FROM_REGEX = re.compile(r'^(>*From )', re.MULTILINE)
+UNSAFE_FILENAME_REGEX = re.compile(r'[^\w.@+-]')
+
+# Alias des placeholders vers les champs du Club (colonnes Sarbacane comprises)
+FIELD_ALIASES = {column.lower(): name for column, name in SARBACANE_COLUMNS.items()}
+FIELD_ALIASES.update({
+    'mobile': 'telephone',
+    'departement': 'dept',
+})
+
+
+# =============================================================================
+# COMPILATION DU TEMPLATE
+# =============================================================================
+
+class CompiledTemplate:
+    """
+    Template compilé : les morceaux de HTML entre placeholders (en bytes),
+    et les en-têtes communs à tous les messages déjà encodés.
+    """
+
+    __slots__ = ('literals', 'fields', 'headers', 'msgid_suffix')
+
+    def __init__(self, literals, fields, headers, msgid_suffix):
+        self.literals = literals
+        self.fields = fields
+        self.headers = headers
+        self.msgid_suffix = msgid_suffix
+
+    def render(self, index, to, values):
+        """Rend un message complet (en-têtes + HTML) pour un destinataire."""
+        literals = self.literals
+        parts = [self.headers, f"To: {to}\nMessage-ID: <{index}.{self.msgid_suffix}>\n\n".encode('utf-8'), literals[0]]
+        for value, literal in zip(values, literals[1:]):
+            parts.append(html.escape(value, quote=True).encode('utf-8'))
+            parts.append(literal)
+        parts.append(b'\n')
+        return b''.join(parts)
+
+
+def compile_template(source, sender=FROM, subject=None, mbox=False):
+    """
+    Découpe le template en littéraux et placeholders, une seule fois.
+    En mode mbox, les lignes 'From ' du HTML sont échappées dès la compilation.
+    """
+    if mbox:
+        source = MBOX_FROM_REGEX.sub(r'>\1', source)
+
+    literals = []
+    fields = []
+    last = 0
+    for match in PLACEHOLDER_REGEX.finditer(source):
+        literals.append(source[last:match.start()].encode('utf-8'))
+        name = match.group(1).strip()
+        fields.append((FIELD_ALIASES.get(name.lower(), name.lower()), match.group(2) or ''))
+        last = match.end()
+    literals.append(source[last:].encode('utf-8'))
+
+    if subject is None:
+        title = TITLE_REGEX.search(source)
+        subject = html.unescape(title.group(1).strip()) if title else ''
+
+    # Seul le nom affiché est encodé (RFC 2047) : l'adresse doit rester lisible
+    name, address = parseaddr(sender)
+    headers = (
+        f"From: {formataddr((name, address), 'utf-8')}\n"
+        f"Subject: {Header(subject, 'utf-8').encode()}\n"
+        f"Date: {formatdate(localtime=True)}\n"
+        "MIME-Version: 1.0\n"
+        "Content-Type: text/html; charset=utf-8\n"
+        "Content-Transfer-Encoding: 8bit\n"
+    ).encode('ascii')
+    domain = address.rsplit('@', 1)[-1]
+    msgid_suffix = f"{int(time.time())}@{domain}"
+    return CompiledTemplate(tuple(literals), tuple(fields), headers, msgid_suffix)
+
+
+def load_template(path, sender=FROM, subject=None, mbox=False):
+    """
+    Construit le template comme un email (build_pages.build_page) puis le
+    compile. ValueError si le build signale une erreur (budget, ligne trop
+    longue, src distant hors manifeste).
+    """
+    from .build_pages import EMAIL_BUDGET, REMOTE_MANIFEST, build_page, load_json
+
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    allowed_remote = frozenset(load_json(REMOTE_MANIFEST, {}).get('urls', []))
+    _, built, errors = build_page((os.path.basename(path), source, True, EMAIL_BUDGET, allowed_remote, {}))
+    if errors:
+        raise ValueError(f"{path}: {' ; '.join(errors)}")
+    return compile_template(built, sender, subject, mbox)
+
+
+def unknown_fields(template):
+    """Placeholders qui ne correspondent à aucun champ du Club (toujours la valeur par défaut)."""
+    return [field for field, _ in template.fields if field not in Club.ATTRIBUTES]
+
+
+def club_values(club, fields):
+    """Valeurs des placeholders pour un club, chacune sur une seule ligne."""
+    return tuple(' '.join((getattr(club, field) if field in Club.ATTRIBUTES else '').split()) or default
+                 for field, default in fields)
+
+
+# =============================================================================
+# RENDU PARALLÈLE
+# =============================================================================
+
+_worker_template = None
+
+
+def _init_worker(template):
+    global _worker_template
+    _worker_template = template
+
+
+def _render_chunk(chunk):
+    """Rend un lot de (index, email, valeurs) ; renvoie les messages bruts."""
+    render = _worker_template.render
+    return [(index, email, render(index, email, values)) for index, email, values in chunk]
+
+
+def _render_mbox_chunk(chunk):
+    """Rend un lot directement en un bloc mbox (un seul transfert vers le parent)."""
+    separator = b'From MAILER-DAEMON ' + time.asctime().encode() + b'\n'
+    parts = []
+    for _, _, message in _render_chunk(chunk):
+        parts.append(separator)
+        parts.append(message)
+        parts.append(b'\n')
+    return len(chunk), b''.join(parts)
+
+
+def _write_eml_chunk(args):
+    """Rend un lot et écrit directement les .eml depuis le worker."""
+    out_dir, chunk = args
+    count = 0
+    for index, email, message in _render_chunk(chunk):
+        filename = f"{index:06d}-{UNSAFE_FILENAME_REGEX.sub('_', email)}.eml"
+        with open(os.path.join(out_dir, filename), 'wb') as f:
+            f.write(message)
+        count += 1
+    return count
+
+
+def chunks(template, clubs, size=CHUNK_SIZE):
+    """Prépare des lots légers à envoyer aux workers (pas de clubs complets)."""
+    chunk = []
+    for index, club in enumerate(clubs):
+        email = club.email.strip()
+        if not email:
+            continue
+        # Valeurs sur une seule ligne : l'échappement mbox du template reste valable
+        chunk.append((index, email, club_values(club, template.fields)))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_all(template, clubs, eml_dir=None, mbox_file=None, workers=None, chunk_size=CHUNK_SIZE):
+    """Rend tous les messages en parallèle et les écrit au fur et à mesure."""
+    total = 0
+    with Pool(workers, initializer=_init_worker, initargs=(template,)) as pool:
+        if eml_dir:
+            os.makedirs(eml_dir, exist_ok=True)
+            jobs = ((eml_dir, chunk) for chunk in chunks(template, clubs, chunk_size))
+            for count in pool.imap_unordered(_write_eml_chunk, jobs):
+                total += count
+        else:
+            with open(mbox_file, 'wb') as f:
+                for count, block in pool.imap(_render_mbox_chunk, chunks(template, clubs, chunk_size)):
+                    f.write(block)
+                    total += count
+    return total
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None, prog=None, base_file=FILE):
+    parser = argparse.ArgumentParser(prog=prog, description="Rendu des emails personnalisés")
+    parser.add_argument('--template', default=TEMPLATE, help=f"template HTML (défaut: {TEMPLATE})")
+    parser.add_argument('--base', default=base_file, help=f"base nettoyée (défaut: {base_file})")
+    parser.add_argument('--from', dest='sender', default=FROM, help="expéditeur")
+    parser.add_argument('--subject', help="sujet (défaut: <title> du template)")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--eml', metavar='DOSSIER', help="un fichier .eml par destinataire")
+    output.add_argument('--mbox', metavar='FICHIER', help="une seule mbox")
+    parser.add_argument('--workers', type=int, default=None, help="processus (défaut: nb de CPU)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="messages par lot")
+    args = parser.parse_args(argv)
+
+    print(f"📄 Build et compilation de {args.template}")
+    try:
+        template = load_template(args.template, args.sender, args.subject, mbox=bool(args.mbox))
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"   {len(template.fields)} placeholders: {', '.join(field for field, _ in template.fields) or 'aucun'}")
+    unknown = unknown_fields(template)
+    if unknown:
+        print(f"   ⚠️ Champs inconnus, valeur par défaut partout: {', '.join(unknown)}")
+
+    clubs = read_sarbacane(args.base)
+    print(f"📊 {len(clubs)} destinataires")
+
+    start = time.perf_counter()
+    total = render_all(template, clubs, args.eml, args.mbox, args.workers, args.chunk_size)
+    duration = time.perf_counter() - start
+
+    per_message = duration / total * 1e6 if total else 0
+    print(f"✅ {total} messages rendus en {duration:.2f}s ({per_message:.0f} µs/message)")
+    print(f"📁 Sortie: {args.eml or args.mbox}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-#!/usr/bin/env python3
 """
 =============================================================================
 SCRAPER LVA-AUTO.FR - Annuaire des Clubs Automobiles
@@ -10,7 +9,7 @@ Stratégie optimisée :
 3. Requests/BeautifulSoup : parcourt chaque lien (rapide et stable)
 
 Usage:
-    python3 scrape_lva_clubs.py
+    python3 -m parsing scrape-lva
 
 =============================================================================
 """
@@ -21,17 +20,8 @@ import time
 import sys
 from datetime import datetime
 
-try:
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    import requests
-    from bs4 import BeautifulSoup
-except ImportError as e:
-    print(f"❌ Module manquant: {e}")
-    print("   pip3 install selenium requests beautifulsoup4")
-    sys.exit(1)
+from . import trace
+from .lazy import require
 
 
 # =============================================================================
@@ -51,6 +41,7 @@ HEADERS = {
 # ÉTAPE 1 : SELENIUM - Récupérer la liste des liens
 # =============================================================================
 
+@trace.traced('lva.selenium')
 def get_club_links_with_selenium():
     """
     Utilise Safari pour :
@@ -59,8 +50,15 @@ def get_club_links_with_selenium():
     3. Cliquer sur CHERCHER
     4. Extraire tous les liens
     """
+    webdriver = require('selenium.webdriver')
+    By = require('selenium.webdriver.common.by').By
+    WebDriverWait = require('selenium.webdriver.support.ui').WebDriverWait
+    EC = require('selenium.webdriver.support.expected_conditions')
+    BeautifulSoup = require('bs4').BeautifulSoup
+
     print("🚀 Démarrage de Safari...")
-    driver = webdriver.Safari()
+    with trace.span('lva.selenium.start'):
+        driver = webdriver.Safari()
     links = []
     
     try:
@@ -158,55 +156,70 @@ def fix_encoding(text):
 
 
 def scrape_club_details(session, url):
-    """Extrait les détails d'une fiche club avec requests."""
+    """
+    Extrait les détails d'une fiche club avec requests. None si la fiche n'a
+    pas pu être lue (réseau, 429, 5xx...) : le club sera retenté.
+    """
     try:
-        response = session.get(url, timeout=10)
-        html = response.text
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        details = {
-            'telephone': '',
-            'email': '',
-            'bureau': '',
-            'site_internet': ''
-        }
-        
-        # TÉLÉPHONE
-        tel_match = re.search(
-            r'T[eéÃ©]+l\.?\s*(0\d[\s\.]*\d{2}[\s\.]*\d{2}[\s\.]*\d{2}[\s\.]*\d{2})',
-            html, re.IGNORECASE
-        )
-        if tel_match:
-            tel = re.sub(r'[^\d\s]', '', tel_match.group(1))
-            details['telephone'] = re.sub(r'\s+', ' ', tel).strip()
-        
-        # EMAIL (Cloudflare)
-        cf = soup.find('span', class_='__cf_email__')
-        if cf and cf.get('data-cfemail'):
-            details['email'] = decode_cloudflare_email(cf.get('data-cfemail'))
-        else:
-            em = re.search(r'[\w\.-]+@[\w\.-]+\.\w{2,}', soup.get_text())
-            if em:
-                details['email'] = em.group(0)
-        
-        # BUREAU
-        bureau = re.search(r'Bureau\s*:\s*</strong>([^<]+)', html)
-        if bureau:
-            details['bureau'] = fix_encoding(bureau.group(1).strip()[:250])
-        
-        # SITE INTERNET
-        site = re.search(r'Site Internet\s*:\s*<a[^>]*href="([^"]+)"', html)
-        if site and site.group(1) not in ('http://', 'https://', ''):
-            details['site_internet'] = site.group(1)
-        
-        return details
+        with trace.span('lva.detail.fetch'):
+            response = session.get(url, timeout=10)
+            if not response.ok:
+                return None
+            html = response.text
+        return parse_club_details(html)
         
     except Exception as e:
         return None
 
 
-def scrape_all_details(clubs):
+@trace.traced('lva.detail.parse')
+def parse_club_details(html):
+    """Extrait téléphone, email, bureau et site d'une fiche club."""
+    BeautifulSoup = require('bs4').BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    details = {
+        'telephone': '',
+        'email': '',
+        'bureau': '',
+        'site_internet': ''
+    }
+    
+    # TÉLÉPHONE
+    tel_match = re.search(
+        r'T[eéÃ©]+l\.?\s*(0\d[\s\.]*\d{2}[\s\.]*\d{2}[\s\.]*\d{2}[\s\.]*\d{2})',
+        html, re.IGNORECASE
+    )
+    if tel_match:
+        tel = re.sub(r'[^\d\s]', '', tel_match.group(1))
+        details['telephone'] = re.sub(r'\s+', ' ', tel).strip()
+    
+    # EMAIL (Cloudflare)
+    cf = soup.find('span', class_='__cf_email__')
+    if cf and cf.get('data-cfemail'):
+        details['email'] = decode_cloudflare_email(cf.get('data-cfemail'))
+    else:
+        em = re.search(r'[\w\.-]+@[\w\.-]+\.\w{2,}', soup.get_text())
+        if em:
+            details['email'] = em.group(0)
+    
+    # BUREAU
+    bureau = re.search(r'Bureau\s*:\s*</strong>([^<]+)', html)
+    if bureau:
+        details['bureau'] = fix_encoding(bureau.group(1).strip()[:250])
+    
+    # SITE INTERNET
+    site = re.search(r'Site Internet\s*:\s*<a[^>]*href="([^"]+)"', html)
+    if site and site.group(1) not in ('http://', 'https://', ''):
+        details['site_internet'] = site.group(1)
+    
+    return details
+
+
+def scrape_all_details(clubs, output_file=OUTPUT_FILE):
     """Parcourt tous les clubs avec requests (rapide et stable)."""
+    requests = require('requests')
+
     print(f"\n📡 Scraping des {len(clubs)} fiches avec requests...")
     print(f"⏱️  Temps estimé: ~{len(clubs) * DELAY / 60:.0f} minutes")
     print("-" * 60)
@@ -222,10 +235,13 @@ def scrape_all_details(clubs):
         
         if details:
             club.update(details)
+            trace.count('lva.details')
             if details.get('email'):
                 success += 1
+                trace.count('lva.emails')
         else:
             errors += 1
+            trace.count('lva.errors')
         
         # Progression tous les 50 + sauvegarde intermédiaire tous les 200
         if (i + 1) % 50 == 0:
@@ -233,10 +249,11 @@ def scrape_all_details(clubs):
             print(f"📊 [{i+1}/{len(clubs)}] {pct}% - ✉️ {success} emails")
         
         if (i + 1) % 200 == 0:
-            save_csv(clubs)
+            save_csv(clubs, output_file)
             print(f"💾 Sauvegarde intermédiaire ({i+1} clubs)")
         
-        time.sleep(DELAY)
+        with trace.span('lva.delay'):
+            time.sleep(DELAY)
     
     print("-" * 60)
     return clubs
@@ -246,9 +263,10 @@ def scrape_all_details(clubs):
 # SAUVEGARDE CSV
 # =============================================================================
 
-def save_csv(clubs):
+@trace.traced('lva.save')
+def save_csv(clubs, output_file=OUTPUT_FILE):
     """Sauvegarde en CSV avec bon encodage."""
-    print(f"💾 Sauvegarde dans {OUTPUT_FILE}...")
+    print(f"💾 Sauvegarde dans {output_file}...")
     
     # Corriger l'encodage de tous les champs texte
     for club in clubs:
@@ -258,12 +276,12 @@ def save_csv(clubs):
     
     fieldnames = ['id', 'nom', 'adresse', 'telephone', 'email', 'bureau', 'site_internet', 'lien']
     
-    with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f:
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(clubs)
     
-    print(f"✅ Fichier créé: {OUTPUT_FILE}")
+    print(f"✅ Fichier créé: {output_file}")
 
 
 def print_stats(clubs):
@@ -291,32 +309,38 @@ def print_stats(clubs):
 # MAIN
 # =============================================================================
 
-def main():
+def scrape(output_file=OUTPUT_FILE):
+    """Scrape l'annuaire complet, sauvegarde le CSV et renvoie les clubs."""
     print(f"""
 {'='*60}
 🏎️  SCRAPER LVA-AUTO.FR
 {'='*60}
 📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-📁 Sortie: {OUTPUT_FILE}
+📁 Sortie: {output_file}
 {'='*60}
 """)
     
+    # ÉTAPE 1: Selenium récupère les liens
+    clubs = get_club_links_with_selenium()
+    
+    if not clubs:
+        print("❌ Aucun lien récupéré")
+        sys.exit(1)
+    
+    # ÉTAPE 2: Requests parcourt les fiches
+    clubs = scrape_all_details(clubs, output_file)
+    
+    # ÉTAPE 3: Sauvegarde
+    save_csv(clubs, output_file)
+    print_stats(clubs)
+    
+    print("🎉 Terminé !")
+    return clubs
+
+
+def main(output_file=OUTPUT_FILE):
     try:
-        # ÉTAPE 1: Selenium récupère les liens
-        clubs = get_club_links_with_selenium()
-        
-        if not clubs:
-            print("❌ Aucun lien récupéré")
-            sys.exit(1)
-        
-        # ÉTAPE 2: Requests parcourt les fiches
-        clubs = scrape_all_details(clubs)
-        
-        # ÉTAPE 3: Sauvegarde
-        save_csv(clubs)
-        print_stats(clubs)
-        
-        print("🎉 Terminé !")
+        return scrape(output_file)
         
     except KeyboardInterrupt:
         print("\n⚠️ Interrompu")
@@ -1,4 +1,3 @@
-#!/usr/bin/env python3
 """
 =============================================================================
 SCRAPER RETROCALAGE.COM - Annuaire des Clubs
@@ -11,7 +10,7 @@ Stratégie :
 4. BeautifulSoup : extrait les données de chaque club
 
 Usage:
-    python3 scrape_retrocalage.py
+    python3 -m parsing scrape-retro
 
 =============================================================================
 """
@@ -19,20 +18,10 @@ Usage:
 import csv
 import re
 import time
-import sys
 from datetime import datetime
 
-try:
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException, NoSuchElementException
-    from bs4 import BeautifulSoup
-except ImportError as e:
-    print(f"❌ Module manquant: {e}")
-    print("   pip3 install selenium beautifulsoup4")
-    sys.exit(1)
+from . import trace
+from .lazy import require
 
 
 # =============================================================================
@@ -41,17 +30,23 @@ except ImportError as e:
 
 URL = "https://retrocalage.com/clubs?mode=list"
 OUTPUT_FILE = "bdd_club/auto/retrocalage.csv"
+DEBUG_FILE = "retrocalage_debug.html"
 
 
 # =============================================================================
 # SELENIUM - Charger toutes les données
 # =============================================================================
 
-def load_all_clubs():
+@trace.traced('retro.selenium')
+def load_all_clubs(url=URL):
     """
     Ouvre le site, clique sur 'Afficher plus' jusqu'à ce qu'il n'y en ait plus,
     puis retourne le HTML complet.
     """
+    webdriver = require('selenium.webdriver')
+    By = require('selenium.webdriver.common.by').By
+    NoSuchElementException = require('selenium.common.exceptions').NoSuchElementException
+
     print("=" * 60)
     print("🚗 SCRAPER RETROCALAGE.COM")
     print("=" * 60)
@@ -68,8 +63,8 @@ def load_all_clubs():
     driver = webdriver.Chrome(options=options)
     
     try:
-        print(f"📄 Chargement de {URL}")
-        driver.get(URL)
+        print(f"📄 Chargement de {url}")
+        driver.get(url)
         
         # Attendre que la page charge
         time.sleep(3)
@@ -116,6 +111,7 @@ def load_all_clubs():
                 # Cliquer
                 button.click()
                 click_count += 1
+                trace.count('retro.clicks')
                 
                 print(f"   Clic #{click_count}...", end="\r")
                 
@@ -141,10 +137,13 @@ def load_all_clubs():
 # BEAUTIFULSOUP - Extraire les données
 # =============================================================================
 
-def extract_clubs(html):
+@trace.traced('retro.parse')
+def extract_clubs(html, debug_file=DEBUG_FILE):
     """
     Parse le HTML et extrait les informations de chaque club.
     """
+    BeautifulSoup = require('bs4').BeautifulSoup
+
     print()
     print("🔍 Analyse du HTML avec BeautifulSoup...")
     
@@ -152,9 +151,9 @@ def extract_clubs(html):
     clubs = []
     
     # Sauvegarder le HTML pour debug si besoin
-    with open('retrocalage_debug.html', 'w', encoding='utf-8') as f:
+    with open(debug_file, 'w', encoding='utf-8') as f:
         f.write(html)
-    print("   💾 HTML sauvegardé dans retrocalage_debug.html pour debug")
+    print(f"   💾 HTML sauvegardé dans {debug_file} pour debug")
     
     # Chercher les cartes de clubs
     # On va d'abord identifier la structure
@@ -257,11 +256,12 @@ def extract_clubs(html):
         print(f"   ✅ {len(clubs)} clubs extraits par méthode titres")
     else:
         print("   ⚠️ Méthode titres n'a rien trouvé, analyse manuelle du HTML nécessaire")
-        print("   Consultez retrocalage_debug.html pour voir la structure")
+        print(f"   Consultez {debug_file} pour voir la structure")
     
     return clubs
 
 
+@trace.traced('retro.save')
 def save_to_csv(clubs, filename):
     """
     Sauvegarde les clubs dans un fichier CSV.
@@ -287,17 +287,17 @@ def save_to_csv(clubs, filename):
 # MAIN
 # =============================================================================
 
-def main():
+def main(output_file=OUTPUT_FILE, debug_file=DEBUG_FILE):
     start_time = datetime.now()
     
     # Étape 1: Charger toutes les données avec Selenium
     html = load_all_clubs()
     
     # Étape 2: Extraire les données avec BeautifulSoup
-    clubs = extract_clubs(html)
+    clubs = extract_clubs(html, debug_file)
     
     # Étape 3: Sauvegarder
-    save_to_csv(clubs, OUTPUT_FILE)
+    save_to_csv(clubs, output_file)
     
     # Résumé
     duration = datetime.now() - start_time
@@ -306,6 +306,8 @@ def main():
     print(f"🏁 Terminé en {duration.total_seconds():.1f} secondes")
     print(f"📊 {len(clubs)} clubs trouvés")
     print("=" * 60)
+    
+    return clubs
 
 
 if __name__ == "__main__":
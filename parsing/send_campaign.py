@@ -0,0 +1,351 @@
+"""
+=============================================================================
+ENVOI DE CAMPAGNE - Envoi en masse sur la base nettoyée
+=============================================================================
+
+Rend chaque message avec render_emails (template compilé une seule fois) et
+l'envoie via un pool de connexions SMTP persistantes :
+- une connexion par worker, réutilisée d'un message à l'autre
+- PIPELINING (RFC 2920) : MAIL FROM / RCPT TO / DATA partent en un seul
+  envoi quand le serveur l'annonce
+- limite globale (messages/s) et limite par domaine destinataire
+- journal d'envoi persistant : une campagne interrompue reprend sans
+  renvoyer les messages déjà acceptés (ni les rejets définitifs 5xx)
+
+Le journal est vidé sur disque après chaque message : au pire, un message
+accepté par le serveur juste avant un crash est renvoyé.
+
+Usage:
+    python3 -m parsing send --template pages/mailing.html --host localhost --port 1025
+    python3 -m parsing send --host smtp.example.com --port 587 --starttls --user moi
+    python3 -m parsing send --rate 20 --domain-rate 2 --connections 4
+
+=============================================================================
+"""
+
+import argparse
+import os
+import queue
+import re
+import smtplib
+import threading
+import time
+from collections import defaultdict
+from email.utils import parseaddr
+
+from .club import read_sarbacane
+from .ratelimit import DomainRateLimiter, RateLimiter
+from .render_emails import FROM, TEMPLATE, club_values, load_template, unknown_fields
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+FILE = "bdd_club/auto/Base Club Auto - Clean.csv"
+LOG_DIR = "bdd_club/auto/envois"
+CONNECTIONS = 4
+RATE = 10.0                 # messages/s, tous domaines confondus
+DOMAIN_RATE = 1.0           # messages/s par domaine destinataire
+MESSAGES_PER_CONNECTION = 100
+TIMEOUT = 30
+
+# Statuts du journal qui ne doivent pas être renvoyés à la reprise
+FINAL_STATUSES = {'sent', 'rejected'}
+
+LEADING_DOT_REGEX = re.compile(rb'^\.', re.MULTILINE)
+EOL_REGEX = re.compile(rb'\r\n|\r|\n')
+
+
+# =============================================================================
+# JOURNAL D'ENVOI
+# =============================================================================
+
+class SendLog:
+    """
+    Journal append-only (email, statut, code, date) : la dernière ligne d'un
+    email fait foi à la reprise.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                last = {}
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) >= 2:
+                        last[parts[0]] = parts[1]
+            self.done = {email for email, status in last.items() if status in FINAL_STATUSES}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def record(self, email, status, code=''):
+        with self.lock:
+            self.file.write(f"{email}\t{status}\t{code}\t{time.strftime('%Y-%m-%dT%H:%M:%S')}\n")
+            self.file.flush()
+            self.counts[status] += 1
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+# =============================================================================
+# CONNEXIONS SMTP
+# =============================================================================
+
+class SmtpConnection:
+    """Connexion SMTP persistante, rouverte au besoin ou tous les N messages."""
+
+    def __init__(self, host, port, starttls=False, user=None, password=None):
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.user = user
+        self.password = password
+        self.smtp = None
+        self.sent = 0
+
+    def connect(self):
+        self.close()
+        smtp = smtplib.SMTP(self.host, self.port, timeout=TIMEOUT)
+        smtp.ehlo()
+        if self.starttls:
+            smtp.starttls()
+            smtp.ehlo()
+        if self.user:
+            smtp.login(self.user, self.password or '')
+        self.smtp = smtp
+        self.sent = 0
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.smtp = None
+
+    def send(self, sender, recipient, message):
+        """Envoie un message ; renvoie (code, texte) de la réponse finale."""
+        if self.smtp is None or self.sent >= MESSAGES_PER_CONNECTION:
+            self.connect()
+        data = LEADING_DOT_REGEX.sub(b'..', EOL_REGEX.sub(b'\r\n', message))
+        if not data.endswith(b'\r\n'):
+            data += b'\r\n'
+
+        smtp = self.smtp
+        if smtp.has_extn('pipelining'):
+            smtp.send(f"MAIL FROM:<{sender}>\r\nRCPT TO:<{recipient}>\r\nDATA\r\n".encode('ascii'))
+            replies = [smtp.getreply() for _ in range(3)]
+            (mail_code, _), (rcpt_code, _), (data_code, _) = replies
+            if mail_code != 250 or rcpt_code not in (250, 251) or data_code != 354:
+                # Transaction avortée : un serveur peut accepter DATA malgré un
+                # RCPT refusé, il faut alors clore le message vide
+                if data_code == 354:
+                    smtp.send(b'.\r\n')
+                    smtp.getreply()
+                smtp.rset()
+                self.sent += 1
+                code, msg = next((reply for reply in replies if reply[0] >= 400), replies[2])
+                return code, msg.decode('utf-8', 'replace')
+        else:
+            code, msg = smtp.mail(sender)
+            if code == 250:
+                code, msg = smtp.rcpt(recipient)
+            if code not in (250, 251):
+                smtp.rset()
+                self.sent += 1
+                return code, msg.decode('utf-8', 'replace')
+            smtp.putcmd('data')
+            code, msg = smtp.getreply()
+            if code != 354:
+                smtp.rset()
+                return code, msg.decode('utf-8', 'replace')
+
+        smtp.send(data + b'.\r\n')
+        code, msg = smtp.getreply()
+        self.sent += 1
+        return code, msg.decode('utf-8', 'replace')
+
+
+# =============================================================================
+# ENVOI
+# =============================================================================
+
+def envelope_address(address):
+    """
+    Adresse utilisable dans MAIL FROM / RCPT TO sans SMTPUTF8 : domaine
+    converti en IDNA, partie locale ASCII obligatoire (ValueError sinon).
+    """
+    local, _, domain = address.rpartition('@')
+    if not local or not local.isascii():
+        raise ValueError(f"partie locale vide ou non ASCII: {address}")
+    try:
+        domain = domain.encode('idna').decode('ascii')
+    except UnicodeError:
+        raise ValueError(f"domaine invalide: {address}") from None
+    return f"{local}@{domain}"
+
+
+def recipients(clubs, template, done):
+    """(index, email, valeurs du template) pour chaque club à envoyer."""
+    seen = set()
+    for index, club in enumerate(clubs):
+        email = club.email.strip().lower()
+        if not email or email in done or email in seen:
+            continue
+        seen.add(email)
+        yield index, email, club_values(club, template.fields)
+
+
+def send_worker(jobs, connection, template, sender, log, global_limiter, domain_limiter):
+    """Consomme la file de messages sur une connexion persistante."""
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        index, email, values = job
+        try:
+            recipient = envelope_address(email)
+        except ValueError:
+            # Définitif : le serveur le refuserait de toute façon sans SMTPUTF8
+            log.record(email, 'rejected', 'address')
+            continue
+        global_limiter.acquire()
+        domain_limiter.acquire(recipient.rsplit('@', 1)[-1])
+        try:
+            message = template.render(index, email, values)
+            code, reply = connection.send(sender, recipient, message)
+        except Exception as e:
+            # Connexion perdue ou erreur inattendue : le message est journalisé
+            # en erreur (renvoyé à la reprise), le worker continue sur une
+            # connexion neuve
+            connection.close()
+            log.record(email, 'error', type(e).__name__)
+            continue
+        if code == 250:
+            log.record(email, 'sent', code)
+        elif code >= 500:
+            log.record(email, 'rejected', code)
+        else:
+            log.record(email, 'deferred', code)
+    connection.close()
+
+
+def send_campaign(clubs, template, sender, log, host, port, connections=CONNECTIONS,
+                  rate=RATE, domain_rate=DOMAIN_RATE, starttls=False, user=None, password=None):
+    """Envoie la campagne ; renvoie les compteurs par statut."""
+    envelope_sender = envelope_address(parseaddr(sender)[1])
+    jobs = queue.Queue(maxsize=connections * 100)
+    global_limiter = RateLimiter(rate, burst=max(1, connections))
+    domain_limiter = DomainRateLimiter(domain_rate)
+
+    threads = []
+    for _ in range(connections):
+        connection = SmtpConnection(host, port, starttls, user, password)
+        thread = threading.Thread(
+            target=send_worker,
+            args=(jobs, connection, template, envelope_sender, log, global_limiter, domain_limiter),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+
+    total = 0
+    try:
+        for job in recipients(clubs, template, log.done):
+            jobs.put(job)
+            total += 1
+            if total % 100 == 0:
+                print(f"  📤 {total} messages en file - envoyés: {log.counts['sent']}")
+        stop_workers(jobs, threads)
+    except KeyboardInterrupt:
+        # Les messages encore en file partiront à la reprise ; ceux en cours
+        # d'envoi doivent être journalisés avant la fermeture du journal
+        print(f"\n⚠️ Interruption : fin des {len(threads)} envois en cours...")
+        while True:
+            try:
+                jobs.get_nowait()
+            except queue.Empty:
+                break
+        stop_workers(jobs, threads)
+        raise
+    return log.counts
+
+
+def stop_workers(jobs, threads):
+    """Un marqueur de fin par worker, puis attend qu'ils aient fini."""
+    for _ in threads:
+        jobs.put(None)
+    for thread in threads:
+        thread.join()
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None, prog=None, base_file=FILE, log_dir=LOG_DIR):
+    parser = argparse.ArgumentParser(prog=prog, description="Envoi de campagne")
+    parser.add_argument('--template', default=TEMPLATE, help=f"template HTML (défaut: {TEMPLATE})")
+    parser.add_argument('--base', default=base_file, help=f"base nettoyée (défaut: {base_file})")
+    parser.add_argument('--campaign', help="nom de la campagne (défaut: nom du template)")
+    parser.add_argument('--from', dest='sender', default=FROM, help="expéditeur")
+    parser.add_argument('--subject', help="sujet (défaut: <title> du template)")
+    parser.add_argument('--host', default='localhost', help="serveur SMTP")
+    parser.add_argument('--port', type=int, default=25, help="port SMTP")
+    parser.add_argument('--starttls', action='store_true', help="STARTTLS après EHLO")
+    parser.add_argument('--user', help="login SMTP (mot de passe: $SMTP_PASSWORD)")
+    parser.add_argument('--connections', type=int, default=CONNECTIONS, help="connexions simultanées")
+    parser.add_argument('--rate', type=float, default=RATE, help="messages/s au total (0 = illimité)")
+    parser.add_argument('--domain-rate', type=float, default=DOMAIN_RATE,
+                        help="messages/s par domaine destinataire (0 = illimité)")
+    args = parser.parse_args(argv)
+    try:
+        envelope_address(parseaddr(args.sender)[1])
+    except ValueError as e:
+        parser.error(f"--from: {e}")
+
+    try:
+        template = load_template(args.template, args.sender, args.subject)
+    except ValueError as e:
+        parser.error(str(e))
+
+    campaign = args.campaign or os.path.splitext(os.path.basename(args.template))[0]
+    log = SendLog(os.path.join(log_dir, f"{campaign}.log"))
+    unknown = unknown_fields(template)
+    if unknown:
+        print(f"⚠️ Champs inconnus, valeur par défaut partout: {', '.join(unknown)}")
+    clubs = read_sarbacane(args.base)
+
+    print(f"📧 Campagne {campaign}: {len(clubs)} lignes, {len(log.done)} déjà traitées")
+    print(f"🔌 {args.connections} connexions vers {args.host}:{args.port} - "
+          f"{args.rate:g} msg/s, {args.domain_rate:g} msg/s/domaine")
+
+    start = time.perf_counter()
+    try:
+        stats = send_campaign(clubs, template, args.sender, log, args.host, args.port,
+                              args.connections, args.rate, args.domain_rate,
+                              args.starttls, args.user, os.environ.get('SMTP_PASSWORD'))
+    finally:
+        log.close()
+    duration = time.perf_counter() - start
+
+    total = sum(stats.values())
+    print(f"\n{'='*60}")
+    print(f"✅ Envoyés:  {stats['sent']}")
+    print(f"❌ Rejetés:  {stats['rejected']}")
+    print(f"⏳ Différés: {stats['deferred']}")
+    print(f"⚠️ Erreurs:  {stats['error']}")
+    print(f"🚀 {total} messages en {duration:.1f}s ({total / duration if duration else 0:.1f} msg/s)")
+    print(f"📁 Journal: {log.path}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+=============================================================================
+SERVEUR SMTP LOCAL - Vérification de send_campaign sans envoi réel
+=============================================================================
+
+Petit serveur SMTP en mémoire (un thread par connexion) : annonce
+PIPELINING, accepte tous les messages sauf ceux adressés au domaine
+REJECT_DOMAIN (550 au RCPT TO).
+
+La vérification envoie une campagne synthétique avec send_campaign, puis
+la relance avec le même journal. En plus des CHECK_COUNT clubs ordinaires :
+un domaine accentué (envoyé en IDNA), un destinataire refusé par le
+serveur et une partie locale non ASCII (refusée avant l'envoi).
+- 1er envoi : CHECK_COUNT + 1 envoyés, 2 rejetés, aucune erreur
+- reprise : aucun message (envoyés et rejets définitifs ne repartent pas)
+
+Usage:
+    python3 -m parsing sink
+    python3 -m parsing sink --count 200 --connections 8
+    python3 -m parsing sink --serve --port 1025
+
+=============================================================================
+"""
+
+import argparse
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+
+from .club import Club, write_sarbacane
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+HOST = "127.0.0.1"
+PORT = 1025
+REJECT_DOMAIN = "rejet.example"
+CHECK_COUNT = 20
+CHECK_TEMPLATE = (
+    "<html><head><title>Vérification envoi</title></head>"
+    "<body><p>Bonjour {{nom|votre club}},</p></body></html>\n"
+)
+
+
+# =============================================================================
+# SERVEUR
+# =============================================================================
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """Une session SMTP : juste ce qu'il faut pour smtplib et send_campaign."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.reply("220 sink ESMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            command = line.decode('ascii', 'replace').strip()
+            verb = command[:4].upper()
+            if verb == 'EHLO':
+                self.wfile.write(b"250-sink\r\n250-PIPELINING\r\n250 8BITMIME\r\n")
+            elif verb in ('HELO', 'NOOP'):
+                self.reply("250 OK")
+            elif verb in ('MAIL', 'RSET'):
+                recipients = []
+                self.reply("250 OK")
+            elif verb == 'RCPT':
+                address = command.partition(':')[2].strip().strip('<>')
+                if address.rsplit('@', 1)[-1].lower() == REJECT_DOMAIN:
+                    self.reply("550 5.1.1 Utilisateur inconnu")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == 'DATA':
+                if not recipients:
+                    self.reply("554 5.5.1 Aucun destinataire valide")
+                    continue
+                self.reply("354 Fin avec <CRLF>.<CRLF>")
+                data = []
+                for line in iter(self.rfile.readline, b''):
+                    if line == b'.\r\n':
+                        break
+                    data.append(line)
+                self.server.store(recipients, b''.join(data))
+                recipients = []
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("502 5.5.2 Commande inconnue")
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """Serveur SMTP qui garde les messages acceptés en mémoire (port 0 = libre)."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host=HOST, port=0):
+        super().__init__((host, port), SinkHandler)
+        self.lock = threading.Lock()
+        self.messages = []
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def store(self, recipients, data):
+        with self.lock:
+            self.messages.append((recipients, data))
+
+
+# =============================================================================
+# VÉRIFICATION
+# =============================================================================
+
+def check(count=CHECK_COUNT, connections=4):
+    """Envoi puis reprise sur le serveur local ; renvoie True si les compteurs sont bons."""
+    from . import send_campaign
+
+    with tempfile.TemporaryDirectory(prefix="sink-") as work_dir, SmtpSink() as sink:
+        threading.Thread(target=sink.serve_forever, daemon=True).start()
+        try:
+            base_file = os.path.join(work_dir, "base.csv")
+            clubs = [Club(nom=f"Club {i}", email=f"club{i}@example.org") for i in range(count)]
+            clubs += [
+                Club(nom="Club accentué", email="contact@rétro-club.fr"),
+                Club(nom="Club refusé", email=f"president@{REJECT_DOMAIN}"),
+                Club(nom="Club non ASCII", email="président@example.org"),
+            ]
+            write_sarbacane(clubs, base_file)
+            template_file = os.path.join(work_dir, "check.html")
+            with open(template_file, 'w', encoding='utf-8') as f:
+                f.write(CHECK_TEMPLATE)
+
+            argv = ['--template', template_file, '--base', base_file, '--host', HOST,
+                    '--port', str(sink.port), '--connections', str(connections),
+                    '--rate', '0', '--domain-rate', '0']
+            print("\n▶️  Premier envoi")
+            first = send_campaign.main(argv, log_dir=work_dir)
+            print("\n▶️  Reprise")
+            rerun = send_campaign.main(argv, log_dir=work_dir)
+        finally:
+            sink.shutdown()
+
+    results = [
+        ("envoyés", first['sent'], count + 1),
+        ("rejetés", first['rejected'], 2),
+        ("erreurs", first['error'], 0),
+        ("reçus par le serveur", len(sink.messages), count + 1),
+        ("domaine en IDNA", sum(['contact@xn--rtro-club-b4a.fr'] == rcpt for rcpt, _ in sink.messages), 1),
+        ("messages personnalisés", sum(b'Bonjour Club ' in data for _, data in sink.messages), count + 1),
+        ("envoyés à la reprise", sum(rerun.values()), 0),
+    ]
+    print(f"\n{'='*60}")
+    for label, got, expected in results:
+        print(f"{'✅' if got == expected else '❌'} {label}: {got} (attendu {expected})")
+    print(f"{'='*60}")
+    return all(got == expected for _, got, expected in results)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Serveur SMTP local et vérification de l'envoi")
+    parser.add_argument('--serve', action='store_true', help="sert seulement, sans vérification (Ctrl-C pour arrêter)")
+    parser.add_argument('--port', type=int, default=PORT, help=f"port avec --serve (défaut: {PORT})")
+    parser.add_argument('--count', type=int, default=CHECK_COUNT, help="clubs ordinaires de la campagne de vérification")
+    parser.add_argument('--connections', type=int, default=4, help="connexions de send_campaign")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        with SmtpSink(port=args.port) as sink:
+            print(f"📭 Serveur SMTP local sur {HOST}:{sink.port}, refus pour @{REJECT_DOMAIN}")
+            try:
+                sink.serve_forever()
+            finally:
+                print(f"\n📬 {len(sink.messages)} messages reçus")
+        return
+
+    if not check(args.count, args.connections):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+=============================================================================
+DONNÉES SYNTHÉTIQUES - Annuaires de clubs à grande échelle
+=============================================================================
+
+Génère des lva-auto.csv / retrocalage.csv fictifs, aux schémas exacts des
+scrapers, pour mesurer le pipeline bien au-delà des ~2 500 clubs réels.
+
+Les défauts des vrais annuaires sont reproduits à des taux réglables :
+- doublons : un club déjà émis réapparaît (même annuaire ou l'autre), avec
+  l'email en majuscules ou entouré d'espaces, le téléphone reformaté
+- mojibake : texte UTF-8 relu en cp1252 ('Ã©' au lieu de 'é')
+- emails absents (avec ou sans site), mal formés, ou sur domaine jetable
+
+Les domaines et les réponses DNS/SMTP ne sont pas simulés ici : voir le stub
+de bench_pipeline.py.
+
+Génération en flux et déterministe pour un --seed donné. Les lignes sont
+des dicts aux noms de champs du Club, écrites sans passer par Club : le
+cache d'adresses de club.py n'est pas rempli, et la mémoire reste bornée
+par le réservoir de doublons (RESERVOIR).
+
+Usage:
+    python3 -m parsing synth --rows 100000 -o /tmp/synth
+    python3 -m parsing synth --rows 1000000 --dup-rate 0.3 --mojibake-rate 0.05
+
+=============================================================================
+"""
+
+import argparse
+import csv
+import os
+import random
+import time
+
+from .club import LVA, LVA_FIELDNAMES, RETRO, RETRO_FIELDNAMES, SOURCE_COLUMNS
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+OUTPUT_DIR = "synth"
+ROWS = 10_000
+LVA_SHARE = 0.48            # part de lva-auto.csv (1497 / 3151 dans les vrais fichiers)
+DUP_RATE = 0.20
+MOJIBAKE_RATE = 0.02
+MISSING_EMAIL_RATE = 0.08
+BAD_EMAIL_RATE = 0.03
+SITE_RATE = 0.45
+PHONE_RATE = 0.85
+RESERVOIR = 20_000          # clubs gardés en mémoire comme candidats aux doublons
+
+KINDS = ['AUTO RÉTRO CLUB', 'CLUB', 'AMICALE', 'ASSOCIATION', 'TEAM', 'CLUB DES AMIS DE LA',
+         'VÉHICULES ANCIENS', 'RÉTRO MÉCANIQUE', 'CLUB HISTORIQUE', 'ÉCURIE', 'PASSION']
+MARQUES = ['CITROËN', '2 CV', 'DS', 'TRACTION', 'PEUGEOT', 'RENAULT', 'ALPINE', 'SIMCA',
+           'PANHARD', 'MATRA', 'FACEL VEGA', 'PORSCHE', 'TRIUMPH', 'MG', 'JAGUAR', 'AUSTIN',
+           'MUSTANG', 'CHEVROLET', 'COCCINELLE', 'COMBI', 'LANCIA', 'FIAT 500', 'MOBYLETTE',
+           'SOLEX', 'JEEP', 'LAND ROVER', 'BMW', 'MERCEDES', 'VOLVO', 'TALBOT']
+REGIONS = ['DE FRANCE', 'DU SUD-OUEST', 'DE BRETAGNE', 'DE LORRAINE', 'D\'ALSACE', 'DU VAR',
+           'DE PROVENCE', 'DE NORMANDIE', 'DU CENTRE', 'DES ALPES', 'DE L\'ARDÈCHE',
+           'DU LÉMAN', 'DE CORSE', 'DES HAUTS-DE-FRANCE', 'D\'AQUITAINE', 'DU PÉRIGORD']
+
+PRENOMS = ['Jean', 'Michel', 'Philippe', 'Alain', 'Gérard', 'Bernard', 'André', 'René',
+           'Jacques', 'Hélène', 'Cécile', 'Françoise', 'Jérôme', 'Stéphane', 'Frédéric',
+           'Céline', 'Noël', 'Benoît', 'Anaïs', 'Joël', 'Thérèse', 'François', 'Sébastien']
+NOMS = ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Petit', 'Durand', 'Leroy',
+        'Moreau', 'Simon', 'Lefèvre', 'Girard', 'Mercier', 'Bonnet', 'Crépin', 'Grégoire',
+        'Pérez', 'Méral', 'Chéreau', 'Besançon', 'Lemaître', 'Rivière', 'Gauthier']
+ROLES = ['Pdt', 'Vice-Pdt', 'Trés.', 'Secrét.', 'Pdt et Secrét.']
+
+VILLE_DEBUTS = ['Saint-', 'Sainte-', 'Le ', 'La ', 'Les ', '', '', '', '']
+VILLE_RACINES = ['Pierre', 'Martin', 'Étienne', 'Germain', 'Aubin', 'Valence', 'Vesseaux',
+                 'Jarville', 'Dieffenbach', 'Villiers', 'Montélimar', 'Bourg', 'Château',
+                 'Fontaine', 'Beaulieu', 'Villeneuve', 'Champigny', 'Mézières', 'Orgères']
+VILLE_FINS = ['', '', '', '-sur-Orge', '-lès-Nemours', '-en-Vexin', '-la-Malgrange',
+              '-au-Val', '-sur-Mer', '-de-Provence', '-le-Château', '-en-Brie']
+
+PROVIDERS = ['gmail.com', 'orange.fr', 'free.fr', 'wanadoo.fr', 'yahoo.fr', 'hotmail.fr',
+             'sfr.fr', 'laposte.net', 'outlook.fr', 'neuf.fr', 'aol.com', 'icloud.com']
+DISPOSABLE = ['yopmail.com', 'mailinator.com', 'trashmail.com']
+TLDS = ['fr', 'fr', 'fr', 'com', 'org', 'net', 'eu']
+LOCAL_PARTS = ['contact', 'president', 'info', 'club', 'secretariat', 'bureau']
+
+LVA_URL = "https://www.lva-auto.fr/annuaire.detail.php?id={id}&idCategorie=C"
+
+ACCENTS = str.maketrans('àâäéèêëîïôöùûüçÀÂÄÉÈÊËÎÏÔÖÙÛÜÇ', 'aaaeeeeiioouuucAAAEEEEIIOOUUUC')
+
+
+# =============================================================================
+# GÉNÉRATEURS DE CHAMPS
+# =============================================================================
+
+def slug(text):
+    """'07 AUTO RÉTRO CLUB' -> '07autoretroclub'"""
+    return ''.join(c for c in text.translate(ACCENTS).lower() if c.isalnum())
+
+
+def mojibake(text):
+    """Simule un UTF-8 relu en cp1252 (ce que fix_encoding de scrape_lva_clubs répare)."""
+    data = text.encode('utf-8')
+    try:
+        return data.decode('cp1252')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+def code_postal(rng):
+    dept = rng.randint(1, 95)
+    if dept == 20:
+        return rng.choice(['20000', '20090', '20200', '20600'])
+    if rng.random() < 0.02:
+        return f"97{rng.randint(1, 6)}{rng.randint(0, 99):02d}"
+    return f"{dept:02d}{rng.randint(0, 999):03d}"
+
+
+def commune(rng):
+    return rng.choice(VILLE_DEBUTS) + rng.choice(VILLE_RACINES) + rng.choice(VILLE_FINS)
+
+
+def nom_club(rng):
+    parts = [rng.choice(KINDS), rng.choice(MARQUES)]
+    if rng.random() < 0.6:
+        parts.append(rng.choice(REGIONS))
+    return ' '.join(parts)
+
+
+def personne(rng):
+    return f"{rng.choice(PRENOMS)} {rng.choice(NOMS)}"
+
+
+def bureau(rng):
+    roles = rng.sample(ROLES, rng.randint(1, 4))
+    return ' ; '.join(f"{role} : {personne(rng)}" for role in roles)
+
+
+def telephone(rng):
+    if rng.random() >= PHONE_RATE:
+        return ''
+    digits = [rng.choice('12345679')] + [str(rng.randint(0, 9)) for _ in range(8)]
+    number = '0' + ''.join(digits)
+    return ' '.join(number[i:i + 2] for i in range(0, 10, 2))
+
+
+def email(rng, handle, site_domain, bad_rate):
+    """Email plausible : provider grand public, domaine du club, ou défectueux."""
+    roll = rng.random()
+    if roll < bad_rate * 0.5:
+        return rng.choice([f"{handle}@", f"{handle}.{rng.choice(PROVIDERS)}",
+                           f"{handle}@@{rng.choice(PROVIDERS)}", f"x@{rng.choice(PROVIDERS)}"])
+    if roll < bad_rate:
+        return f"{handle}@{rng.choice(DISPOSABLE)}"
+    if site_domain and rng.random() < 0.4:
+        return f"{rng.choice(LOCAL_PARTS)}@{site_domain}"
+    return f"{handle}@{rng.choice(PROVIDERS)}"
+
+
+# =============================================================================
+# CLUBS
+# =============================================================================
+
+def new_club(rng, serial, source, rates):
+    name = nom_club(rng)
+    # Le numéro de série rend emails et domaines uniques, même à 1M de lignes
+    handle = f"{slug(name)[:16]}{serial}"
+    cp = code_postal(rng)
+    adresse = f"{cp} {commune(rng)}" + (" - France" if source == LVA else "")
+    site_domain = f"{handle}.{rng.choice(TLDS)}" if rng.random() < SITE_RATE else ''
+    mail = '' if rng.random() < rates['missing'] else email(rng, handle, site_domain, rates['bad'])
+    return {
+        'nom': name,
+        'adresse': adresse,
+        'telephone': telephone(rng),
+        'email': mail,
+        'representant': bureau(rng) if source == LVA or rng.random() < 0.3 else '',
+        'site': f"http://www.{site_domain}" if site_domain else '',
+    }
+
+
+def duplicate(rng, original, source):
+    """Le même club vu par une autre fiche : email, téléphone et adresse retouchés."""
+    mail = original['email']
+    roll = rng.random()
+    if roll < 0.3:
+        mail = mail.upper()
+    elif roll < 0.5:
+        mail = f" {mail} "
+    phone = original['telephone'].replace(' ', rng.choice(['', '.', ' ']))
+    adresse = original['adresse']
+    if source == LVA and not adresse.endswith(" - France"):
+        adresse += " - France"
+    elif source == RETRO:
+        adresse = adresse.replace(" - France", "")
+    return {**original, 'email': mail, 'telephone': phone, 'adresse': adresse}
+
+
+def with_mojibake(rng, club):
+    """Corrompt l'encodage des champs texte (nom, adresse, représentant)."""
+    return {**club, 'nom': mojibake(club['nom']), 'adresse': mojibake(club['adresse']),
+            'representant': mojibake(club['representant'])}
+
+
+def generate(rows, seed=0, dup_rate=DUP_RATE, mojibake_rate=MOJIBAKE_RATE,
+             missing_rate=MISSING_EMAIL_RATE, bad_rate=BAD_EMAIL_RATE, lva_share=LVA_SHARE):
+    """
+    Produit (source, club) dans l'ordre des fichiers : tous les lva-auto
+    puis tous les retrocalage ; un club est un dict aux noms de champs du
+    Club. Les doublons sont tirés d'un réservoir de clubs déjà émis
+    (échantillonnage uniforme, taille bornée).
+    """
+    rng = random.Random(seed)
+    rates = {'missing': missing_rate, 'bad': bad_rate}
+    reservoir = []
+    seen = 0
+    lva_rows = round(rows * lva_share)
+
+    for i in range(rows):
+        source = LVA if i < lva_rows else RETRO
+        if reservoir and rng.random() < dup_rate:
+            club = duplicate(rng, rng.choice(reservoir), source)
+        else:
+            club = new_club(rng, i + 1, source, rates)
+            if club['email']:
+                seen += 1
+                if len(reservoir) < RESERVOIR:
+                    reservoir.append(club)
+                else:
+                    slot = rng.randrange(seen)
+                    if slot < RESERVOIR:
+                        reservoir[slot] = club
+        if mojibake_rate and rng.random() < mojibake_rate:
+            club = with_mojibake(rng, club)
+        if source == LVA:
+            club['id'] = f"C{i + 1}"
+            club['lien'] = LVA_URL.format(id=club['id'])
+        yield source, club
+
+
+def write(rows, output_dir, **options):
+    """Écrit lva-auto.csv et retrocalage.csv dans output_dir, renvoie leurs chemins."""
+    os.makedirs(output_dir, exist_ok=True)
+    lva_file = os.path.join(output_dir, LVA)
+    retro_file = os.path.join(output_dir, RETRO)
+
+    with open(lva_file, 'w', newline='', encoding='utf-8') as lva_f, \
+            open(retro_file, 'w', newline='', encoding='utf-8') as retro_f:
+        writers = {}
+        for source, f, fieldnames in ((LVA, lva_f, LVA_FIELDNAMES), (RETRO, retro_f, RETRO_FIELDNAMES)):
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            writers[source] = (writer, [SOURCE_COLUMNS[column] for column in fieldnames])
+        for source, club in generate(rows, **options):
+            writer, names = writers[source]
+            writer.writerow([club.get(name, '') for name in names])
+    return lva_file, retro_file
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Génère des annuaires de clubs synthétiques")
+    parser.add_argument('--rows', type=int, default=ROWS, help=f"lignes au total, deux fichiers confondus (défaut: {ROWS})")
+    parser.add_argument('-o', '--output', default=OUTPUT_DIR, help=f"dossier de sortie (défaut: {OUTPUT_DIR})")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dup-rate', type=float, default=DUP_RATE, help="part de lignes qui répètent un club déjà émis")
+    parser.add_argument('--mojibake-rate', type=float, default=MOJIBAKE_RATE, help="part de lignes mal encodées")
+    parser.add_argument('--missing-email-rate', type=float, default=MISSING_EMAIL_RATE, help="part de clubs sans email")
+    parser.add_argument('--bad-email-rate', type=float, default=BAD_EMAIL_RATE, help="part d'emails mal formés ou jetables")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    paths = write(args.rows, args.output, seed=args.seed, dup_rate=args.dup_rate,
+                  mojibake_rate=args.mojibake_rate, missing_rate=args.missing_email_rate,
+                  bad_rate=args.bad_email_rate)
+    for path in paths:
+        print(f"✅ {path} ({os.path.getsize(path) / 1e6:.1f} Mo)")
+    print(f"🏁 {args.rows} lignes en {time.perf_counter() - start:.1f} secondes")
+    return paths
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Instrumentation commune des étapes du pipeline : spans, compteurs, profil.
+
+Désactivée par défaut : span() renvoie alors un context manager partagé qui
+ne fait rien, et count() sort immédiatement. Activée, elle écrit en fin de
+run un fichier Chrome trace (chrome://tracing, https://ui.perfetto.dev) et
+affiche le temps total par span.
+
+Activation:
+    python3 -m parsing --trace run.json all
+    python3 -m parsing --trace run.json --profile clean.smtp clean
+    PARSING_TRACE=run.json python3 -m parsing.rebuild_base
+
+Usage dans le code:
+    with trace.span('lva.detail.fetch', url=url):
+        ...
+    trace.count('clean.dns')
+"""
+
+import atexit
+import functools
+import os
+import threading
+import time
+from collections import defaultdict
+
+_enabled = False
+_path = None
+_events = []
+_counters = defaultdict(int)
+_lock = threading.Lock()
+_origin = time.perf_counter()
+_profile_name = None
+_profiler = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'start', 'profiling')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.profiling = False
+
+    def __enter__(self):
+        if self.name == _profile_name and _profiler is not None:
+            try:
+                _profiler.enable()
+                self.profiling = True
+            except ValueError:
+                # Un autre thread profile déjà ce span
+                pass
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        if self.profiling:
+            _profiler.disable()
+        event = {
+            'name': self.name,
+            'cat': self.name.split('.')[0],
+            'ph': 'X',
+            'ts': (self.start - _origin) * 1e6,
+            'dur': (end - self.start) * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if self.args:
+            event['args'] = {k: str(v) for k, v in self.args.items()}
+        _events.append(event)
+        return False
+
+
+def span(name, **args):
+    """Mesure un bloc `with`. Sans effet (et quasi gratuit) si le tracing est désactivé."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def traced(name):
+    """Décorateur : la fonction entière devient un span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    """Incrémente un compteur (exporté en événement Chrome 'C')."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] += n
+        value = _counters[name]
+    _events.append({
+        'name': name,
+        'ph': 'C',
+        'ts': (time.perf_counter() - _origin) * 1e6,
+        'pid': os.getpid(),
+        'args': {'value': value},
+    })
+
+
+def enable(path, profile=None):
+    """Active le tracing ; le fichier est écrit à la sortie du programme."""
+    global _enabled, _path, _profile_name, _profiler
+    if not _enabled:
+        atexit.register(finish)
+    _enabled = True
+    _path = path
+    if profile:
+        import cProfile  # ~30 ms : seulement quand un profil est demandé
+        _profile_name = profile
+        _profiler = cProfile.Profile()
+
+
+def summary():
+    """{nom du span: (nombre, durée totale en s)}"""
+    totals = defaultdict(lambda: [0, 0.0])
+    for event in list(_events):
+        if event['ph'] == 'X':
+            totals[event['name']][0] += 1
+            totals[event['name']][1] += event['dur'] / 1e6
+    return {name: tuple(value) for name, value in totals.items()}
+
+
+def finish():
+    """Écrit la trace (et le profil) puis désactive l'instrumentation."""
+    global _enabled
+    if not _enabled:
+        return
+    _enabled = False
+
+    import json
+    with open(_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'traceEvents': _events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'counters': dict(_counters)},
+        }, f)
+
+    print(f"\n⏱️  Trace: {_path} ({len(_events)} événements)")
+    for name, (calls, total) in sorted(summary().items(), key=lambda item: -item[1][1]):
+        print(f"   {name:<28} {calls:>6} x {total:9.3f}s")
+    for name, value in sorted(_counters.items()):
+        print(f"   #{name:<27} {value:>6}")
+
+    if _profiler is not None:
+        import pstats
+        profile_path = f"{os.path.splitext(_path)[0]}.{_profile_name}.prof"
+        try:
+            stats = pstats.Stats(_profiler)
+        except TypeError:
+            print(f"\n🔬 Aucun span {_profile_name} exécuté, pas de profil")
+            return
+        _profiler.dump_stats(profile_path)
+        print(f"\n🔬 Profil de {_profile_name}: {profile_path}")
+        stats.sort_stats('cumulative').print_stats(15)
+
+
+if os.environ.get('PARSING_TRACE'):
+    enable(os.environ['PARSING_TRACE'], os.environ.get('PARSING_PROFILE'))
@@ -0,0 +1,326 @@
+"""
+=============================================================================
+VEILLE DES ANNUAIRES - Nouveaux clubs sans re-crawl complet
+=============================================================================
+
+Au lieu de relancer scrape-lva / scrape-retro en entier, ne charge que les
+vues liste des annuaires et les compare aux fichiers déjà stockés :
+
+- lva-auto.fr : liste de résultats (get_club_links_with_selenium), comparée
+  sur l'id des fiches. Seules les fiches des clubs nouveaux sont
+  téléchargées. Une fiche disparue de la liste est revérifiée avant d'être
+  déclarée retirée.
+- retrocalage.com : la liste contient déjà toutes les infos, comparée sur
+  le nom (normalisé). Aucune requête en plus.
+
+Les nouveaux clubs sont ajoutés à lva-auto.csv / retrocalage.csv et, si leur
+email n'y est pas déjà, à Base Club Auto.csv (plus base propre / NPAI avec
+--clean). Les clubs retirés ne sont pas supprimés de la base : ils sont
+notés dans le journal veille.csv, comme les ajouts.
+
+Garde-fou : si plus de MAX_REMOVED_SHARE des clubs stockés manquent à la
+liste, la liste est considérée comme incomplète (page mal chargée) et
+aucun retrait n'est enregistré.
+
+Coût d'un passage : deux sessions Selenium, plus une requête par club
+nouveau ou disparu côté lva-auto.
+
+Usage:
+    python3 -m parsing watch
+    python3 -m parsing watch --interval 24 --clean
+    python3 -m parsing watch --only retro
+
+=============================================================================
+"""
+
+import argparse
+import csv
+import os
+import re
+import time
+from datetime import datetime
+
+from . import trace
+from .club import (LVA, LVA_FIELDNAMES, RETRO, RETRO_FIELDNAMES, Club, clear_places, read_sarbacane,
+                   read_source, write_sarbacane, write_source)
+from .lazy import require
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+LVA_FILE = "bdd_club/auto/lva-auto.csv"
+RETRO_FILE = "bdd_club/auto/retrocalage.csv"
+BASE_FILE = "bdd_club/auto/Base Club Auto.csv"
+CLEAN_FILE = "bdd_club/auto/Base Club Auto - Clean.csv"
+NPAI_FILE = "bdd_club/auto/npai.csv"
+JOURNAL_FILE = "bdd_club/auto/veille.csv"
+SITE_EMAILS_FILE = "bdd_club/auto/emails_sites.csv"
+DEBUG_FILE = "retrocalage_debug.html"
+JOURNAL_FIELDS = ['date', 'source', 'evenement', 'id', 'nom', 'email']
+MAX_REMOVED_SHARE = 0.10
+SOURCES = ('lva', 'retro')
+
+
+# =============================================================================
+# ÉTAT STOCKÉ
+# =============================================================================
+
+def name_key(nom):
+    """Clé de comparaison des noms : encodage réparé, casse et espaces ignorés."""
+    from .scrape_lva_clubs import fix_encoding
+    return re.sub(r'\s+', ' ', fix_encoding(nom or '')).strip().casefold()
+
+
+def read_journal(path):
+    """{(source, id ou nom normalisé)} des clubs déjà notés comme retirés."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {(row['source'], row['id'] or name_key(row['nom']))
+                for row in csv.DictReader(f) if row['evenement'] == 'retire'}
+
+
+def append_journal(path, events):
+    if not events:
+        return
+    new = not os.path.exists(path) or os.path.getsize(path) == 0
+    date = datetime.now().isoformat(timespec='seconds')
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if new:
+            writer.writerow(JOURNAL_FIELDS)
+        for event, club in events:
+            writer.writerow([date, club.source, event, club.id, club.nom, club.email])
+
+
+def plausible_removals(gone, stored, label):
+    """Applique le garde-fou MAX_REMOVED_SHARE ; renvoie les retraits à traiter."""
+    if stored and len(gone) > len(stored) * MAX_REMOVED_SHARE:
+        print(f"   ⚠️ {len(gone)} clubs {label} absents de la liste ({len(gone) * 100 // len(stored)}%) : "
+              f"liste incomplète ? Retraits ignorés")
+        return []
+    return gone
+
+
+# =============================================================================
+# LVA-AUTO.FR
+# =============================================================================
+
+def diff_lva(listing, stored, removed_before):
+    """Liens nouveaux (id inconnu) et clubs stockés absents de la liste."""
+    stored_ids = {club.id for club in stored if club.id}
+    listed_ids = set()
+    new = []
+    for link in listing:
+        if link['id'] and link['id'] not in stored_ids and link['id'] not in listed_ids:
+            new.append(link)
+        listed_ids.add(link['id'])
+    gone = [club for club in stored
+            if club.id and club.id not in listed_ids and (LVA, club.id) not in removed_before]
+    return new, gone
+
+
+def is_removed(session, club):
+    """Une fiche est retirée si sa page répond en erreur ou ne contient plus rien."""
+    from .scrape_lva_clubs import parse_club_details
+    try:
+        with trace.span('watch.lva.fetch'):
+            response = session.get(club.lien, timeout=10)
+    except Exception:
+        # Réseau indisponible : on ne conclut rien, on réessaiera au prochain passage
+        return False
+    if response.status_code in (404, 410):
+        return True
+    return response.ok and not any(parse_club_details(response.text).values())
+
+
+@trace.traced('watch.lva')
+def check_lva(lva_file, removed_before):
+    """
+    Renvoie (nouveaux clubs avec leurs détails, clubs retirés, requêtes HTTP).
+    Un club dont la fiche n'a pas pu être lue n'est pas ajouté : toujours
+    inconnu du fichier stocké, il sera retenté au prochain passage.
+    """
+    from . import scrape_lva_clubs as lva
+    requests = require('requests')
+
+    listing = lva.get_club_links_with_selenium()
+    if not listing:
+        print("   ⚠️ Liste lva-auto vide, passage ignoré")
+        return [], [], 0
+
+    stored = read_source(lva_file, LVA) if os.path.exists(lva_file) else []
+    new, gone = diff_lva(listing, stored, removed_before)
+    gone = plausible_removals(gone, stored, 'lva-auto')
+    print(f"   lva-auto: {len(listing)} en liste, {len(stored)} stockés -> "
+          f"{len(new)} nouveaux, {len(gone)} disparus")
+
+    session = requests.Session()
+    session.headers.update(lva.HEADERS)
+    added = []
+    failed = 0
+    for link in new:
+        details = lva.scrape_club_details(session, link['lien'])
+        time.sleep(lva.DELAY)
+        if details is None:
+            failed += 1
+            continue
+        row = {**link, **details}
+        for key in ('nom', 'adresse', 'bureau'):
+            row[key] = lva.fix_encoding(row.get(key, ''))
+        added.append(Club.from_row(row, LVA))
+    if failed:
+        print(f"   ⚠️ {failed} fiches illisibles, retentées au prochain passage")
+
+    removed = []
+    for club in gone:
+        if is_removed(session, club):
+            removed.append(club)
+        time.sleep(lva.DELAY)
+
+    return added, removed, len(new) + len(gone)
+
+
+# =============================================================================
+# RETROCALAGE.COM
+# =============================================================================
+
+def diff_retro(listing, stored, removed_before):
+    """Clubs de la liste au nom inconnu et clubs stockés absents de la liste."""
+    stored_keys = {name_key(club.nom) for club in stored}
+    listed_keys = set()
+    new = []
+    for row in listing:
+        key = name_key(row.get('nom'))
+        if key and key not in stored_keys and key not in listed_keys:
+            new.append(Club.from_row(row, RETRO))
+        listed_keys.add(key)
+    gone = [club for club in stored
+            if name_key(club.nom) not in listed_keys and (RETRO, name_key(club.nom)) not in removed_before]
+    return new, gone
+
+
+@trace.traced('watch.retro')
+def check_retro(retro_file, removed_before, debug_file=DEBUG_FILE):
+    """Renvoie (nouveaux clubs, clubs retirés) d'après la seule vue liste."""
+    from . import scrape_retrocalage as retro
+
+    listing = retro.extract_clubs(retro.load_all_clubs(), debug_file)
+    if not listing:
+        print("   ⚠️ Liste retrocalage vide, passage ignoré")
+        return [], []
+
+    stored = read_source(retro_file, RETRO) if os.path.exists(retro_file) else []
+    new, gone = diff_retro(listing, stored, removed_before)
+    gone = plausible_removals(gone, stored, 'retrocalage')
+    print(f"   retrocalage: {len(listing)} en liste, {len(stored)} stockés -> "
+          f"{len(new)} nouveaux, {len(gone)} retirés")
+    return new, gone
+
+
+# =============================================================================
+# MISE À JOUR DE LA BASE
+# =============================================================================
+
+def append_to_base(clubs, base_file, site_emails):
+    """Ajoute à la base les clubs dont l'email n'y est pas encore ; renvoie les clubs ajoutés."""
+    from .rebuild_base import club_email
+
+    seen = {club.email.strip().lower() for club in read_sarbacane(base_file)} if os.path.exists(base_file) else set()
+    added = []
+    for club in clubs:
+        email = club_email(club, site_emails)
+        if email and email not in seen:
+            seen.add(email)
+            added.append(club.replace(email=email))
+    write_sarbacane(added, base_file, mode='a')
+    return added
+
+
+def clean_new(clubs, clean_file, npai_file):
+    """Valide les emails des seuls nouveaux clubs et les ajoute à la base propre ou aux NPAI."""
+    from .clean_emails_strict import validate_email
+
+    mx_cache, smtp_results = {}, {}
+    valid, npai = [], []
+    for club in clubs:
+        is_valid, reason = validate_email(club.email, mx_cache, smtp_results)
+        if is_valid:
+            valid.append(club)
+        else:
+            club.raison = reason
+            npai.append(club)
+    write_sarbacane(valid, clean_file, mode='a')
+    if npai:
+        write_sarbacane(npai, npai_file, npai=True, mode='a')
+    print(f"   🔒 {len(valid)} valides, {len(npai)} NPAI")
+    return valid
+
+
+def watch_once(sources=SOURCES, clean=False, lva_file=LVA_FILE, retro_file=RETRO_FILE,
+               base_file=BASE_FILE, clean_file=CLEAN_FILE, npai_file=NPAI_FILE,
+               journal_file=JOURNAL_FILE, site_emails_file=SITE_EMAILS_FILE, debug_file=DEBUG_FILE):
+    """Un passage de veille ; renvoie les clubs ajoutés à la base."""
+    from .crawl_sites import load_csv
+
+    print(f"\n👀 Veille {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    removed_before = read_journal(journal_file)
+    new_clubs = []
+    events = []
+
+    if 'lva' in sources:
+        added, removed, requests_count = check_lva(lva_file, removed_before)
+        write_source(added, lva_file, LVA_FIELDNAMES, mode='a')
+        new_clubs += added
+        events += [('retire', club) for club in removed]
+        print(f"   📡 {requests_count} fiches lva-auto téléchargées")
+
+    if 'retro' in sources:
+        added, removed = check_retro(retro_file, removed_before, debug_file)
+        write_source(added, retro_file, RETRO_FIELDNAMES, mode='a')
+        new_clubs += added
+        events += [('retire', club) for club in removed]
+
+    base_added = append_to_base(new_clubs, base_file, load_csv(site_emails_file))
+    events += [('nouveau', club) for club in new_clubs]
+    append_journal(journal_file, events)
+
+    print(f"   ✅ {len(new_clubs)} nouveaux clubs, {len(base_added)} ajoutés à {base_file}, "
+          f"{sum(1 for event, _ in events if event == 'retire')} retirés")
+    if clean and base_added:
+        clean_new(base_added, clean_file, npai_file)
+    return base_added
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None, prog=None, **paths):
+    parser = argparse.ArgumentParser(prog=prog, description="Veille des annuaires (vues liste uniquement)")
+    parser.add_argument('--interval', type=float, default=0, help="heures entre deux passages (défaut: un seul passage)")
+    parser.add_argument('--only', choices=SOURCES, help="un seul annuaire")
+    parser.add_argument('--clean', action='store_true', help="valide les nouveaux emails (MX + SMTP) et complète la base propre")
+    args = parser.parse_args(argv)
+
+    sources = (args.only,) if args.only else SOURCES
+    while True:
+        try:
+            watch_once(sources, args.clean, **paths)
+        except Exception as e:
+            # En mode périodique, une erreur (Selenium, réseau) ne doit pas arrêter la veille
+            if not args.interval:
+                raise
+            print(f"   ❌ Passage en échec: {e}")
+        if not args.interval:
+            break
+        # Les adresses des clubs relus à chaque passage ne servent plus
+        clear_places()
+        print(f"   💤 Prochain passage dans {args.interval:g} h")
+        time.sleep(args.interval * 3600)
+
+
+if __name__ == "__main__":
+    main()